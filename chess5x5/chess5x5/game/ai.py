@@ -1,90 +1,482 @@
-from typing import Tuple, List, Callable, Optional
-from .board import Board, Color, Piece
+import math
+import struct
+import time
+from array import array
+from typing import Dict, Tuple, List, Callable, Optional
+from .board import (
+    CODE_PIECES, MOVE_CAPTURE, MOVE_PROMOTION, MOVE_SQUARE_MASK, MOVE_TO_SHIFT,
+    Board, Color, Piece, PieceType, decode_move, new_move_buffer,
+)
+from .evaluation import MATERIAL_VALUES
+from .tablebase import Tablebase
+from .transposition import (
+    DEFAULT_TT_MEMORY_MB, EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable,
+)
+
+# Добавка к ключу позиции, если color не совпадает с очередью хода на доске
+_OTHER_SIDE_KEY = 0x9E3779B97F4A7C15
+
+# Предел глубины итеративного углубления по умолчанию
+MAX_SEARCH_DEPTH = 32
+
+# Аспирационное окно итеративного углубления: полуширина окна вокруг оценки
+# прошлой итерации (в единицах оценки) и во сколько раз оно расширяется
+# после каждого выхода оценки за окно
+ASPIRATION_WINDOW = 0.5
+ASPIRATION_GROWTH = 4.0
+
+# Порядок ходов в узле: ход из таблицы транспозиций, взятия и превращения
+# (самая ценная жертва самой дешевой фигурой), ходы-убийцы, история
+HASH_MOVE_SCORE = 1 << 30
+TACTICAL_SCORE = 1 << 20
+KILLER_SCORE = 1 << 19
+KILLERS_PER_PLY = 2
+
+# Запас delta pruning в единицах оценки (стоимость пешки — 1): взятие,
+# которое и с этим запасом не поднимает оценку до alpha, не перебирается
+DELTA_MARGIN = 2.0
+# Сколько полуходов форсированного перебора под боем короля допускает quiescence
+MAX_QUIESCENCE_EVASION_PLY = 4
+
+# Ценность фигуры по коду клетки для MVV-LVA и выигрыш от превращения пешки
+_CODE_VALUES = tuple(int(MATERIAL_VALUES[piece.type]) if piece else 0 for piece in CODE_PIECES)
+_PROMOTION_GAIN = int(MATERIAL_VALUES[PieceType.ROOK] - MATERIAL_VALUES[PieceType.PAWN])
+# Биты клеток хода: индекс в таблице истории
+_MOVE_SQUARES = MOVE_SQUARE_MASK | MOVE_SQUARE_MASK << MOVE_TO_SHIFT
+
+def _next_above_compat(value: float) -> float:
+    """Следующее за value число double; замена math.nextafter(value, inf) для Python 3.8"""
+    if value != value or value == math.inf:
+        return value
+    if value == 0.0:
+        return 5e-324
+    bits = struct.unpack('<q', struct.pack('<d', value))[0]
+    bits += 1 if value > 0 else -1
+    return struct.unpack('<d', struct.pack('<q', bits))[0]
+
+if hasattr(math, 'nextafter'):
+    def _next_above(value: float) -> float:
+        return math.nextafter(value, math.inf)
+else:
+    _next_above = _next_above_compat
+
+class _SearchTimeout(Exception):
+    """Время на итерацию поиска истекло"""
 
 class AlphaBetaAI:
-    def __init__(self, evaluation_function: Callable[[Board, Color], float]):
+    def __init__(self, evaluation_function: Callable[[Board, Color], float],
+                 tablebase: Optional[Tablebase] = None,
+                 tt_memory_mb: Optional[float] = DEFAULT_TT_MEMORY_MB,
+                 move_ordering: bool = True,
+                 quiescence: bool = True,
+                 delta_margin: Optional[float] = DELTA_MARGIN,
+                 principal_variation: bool = True,
+                 aspiration_window: Optional[float] = ASPIRATION_WINDOW):
+        """
+        tablebase: эндшпильные таблицы
+        tt_memory_mb: размер таблицы транспозиций; None — без таблицы.
+        Таблица сохраняется между вызовами get_best_move, поэтому
+        функция оценки должна быть чистой.
+        move_ordering: упорядочивать ходы (MVV-LVA, убийцы, история);
+        без него ходы идут в порядке генерации, первым — ход из таблицы
+        quiescence: на листьях перебирать взятия и превращения до спокойной позиции
+        delta_margin: запас delta pruning в quiescence; None — без отсечения.
+        Стоимость фигур для него берется из атрибута piece_values функции
+        оценки (как у PositionEvaluator) или из MATERIAL_VALUES
+        principal_variation: перебор главного варианта (PVS) — ходы после
+        первого проверяются с нулевым окном и перебираются заново, только
+        если оказались лучше
+        aspiration_window: полуширина аспирационного окна в search;
+        None — каждая итерация с полным окном
+        """
         self.evaluation_function = evaluation_function
+        # Эндшпильные таблицы: позиции из них не перебираются дальше
+        self.tablebase = tablebase
+        self.transposition_table = TranspositionTable(tt_memory_mb) if tt_memory_mb is not None else None
+        # Буферы ходов по глубине: на каждом уровне рекурсии свой, переиспользуемый
+        self._move_buffers: List[array] = []
+        # Срок текущей итерации поиска (None — без ограничения)
+        self._deadline: Optional[float] = None
+        self.move_ordering = move_ordering
+        self.quiescence = quiescence
+        self.delta_margin = delta_margin
+        self.principal_variation = principal_variation
+        self.aspiration_window = aspiration_window
+        piece_values = getattr(evaluation_function, 'piece_values', MATERIAL_VALUES)
+        self._gain_values = tuple(piece_values[piece.type] if piece else 0.0 for piece in CODE_PIECES)
+        self._promotion_gain = piece_values[PieceType.ROOK] - piece_values[PieceType.PAWN]
+        self._king_value = piece_values[PieceType.KING]
+        self._quiescence_buffers: List[array] = []
+        # Ходы-убийцы по расстоянию от корня и история отсечений по цвету
+        self._killers: List[List[int]] = []
+        self._history: Dict[Color, List[int]] = {}
+        self._root_depth = 0
+        # Статистика последнего поиска: узлы основного перебора и quiescence,
+        # отсечения (из них на первом ходе), повторные переборы PVS и после
+        # выхода за аспирационное окно, глубина последней завершенной итерации
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.completed_depth = 0
+        self._new_search()
+    
+    def _new_search(self):
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        self._killers = []
+        self._history = {color: [0] * (_MOVE_SQUARES + 1) for color in Color}
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.completed_depth = 0
+    
+    def get_search_statistics(self) -> Dict[str, float]:
+        """
+        Возвращает статистику последнего поиска. Доля отсечений на первом
+        ходе показывает качество упорядочивания ходов
+        """
+        return {
+            "nodes": self.nodes,
+            "quiescence_nodes": self.quiescence_nodes,
+            "completed_depth": self.completed_depth,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs > 0 else 0,
+            "pvs_researches": self.pvs_researches,
+            "aspiration_researches": self.aspiration_researches
+        }
     
     def get_best_move(self, board: Board, color: Color, depth: int = 4) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        self._new_search()
+        best_move, _ = self._attached(board, lambda: self._search_root(board, color, depth))
+        self.completed_depth = depth
+        return decode_move(best_move) if best_move is not None else None
+    
+    def search(self, board: Board, color: Color, time_limit: Optional[float] = None,
+               max_depth: int = MAX_SEARCH_DEPTH) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Итеративное углубление: поиск на глубине 1, 2, ... max_depth,
+        пока не истекут time_limit секунд. Возвращает лучший ход последней
+        завершенной итерации; первая итерация завершается всегда.
+        Лучший ход прошлой итерации перебирается первым, а продолжение
+        лучшей линии берется из таблицы транспозиций. Итерация ищет
+        в аспирационном окне вокруг оценки прошлой итерации и при выходе
+        оценки за окно повторяется с более широким окном.
+        """
+        start = time.perf_counter()
+        self._new_search()
+        # Прерванная итерация оставляет доску посреди перебора, поэтому ищем на копии
+        board = board.copy()
+        best_move, _ = self._attached(board, lambda: self._iterate(board, color, start, time_limit, max_depth))
+        return decode_move(best_move) if best_move is not None else None
+    
+    def _iterate(self, board: Board, color: Color, start: float,
+                 time_limit: Optional[float], max_depth: int) -> Tuple[Optional[int], float]:
         best_move = None
         best_value = float('-inf')
-        alpha = float('-inf')
-        beta = float('inf')
+        try:
+            for depth in range(1, max_depth + 1):
+                try:
+                    move, value = self._aspiration_search(board, color, depth, best_move, best_value)
+                except _SearchTimeout:
+                    break
+                if move is None:
+                    break
+                best_move, best_value = move, value
+                self.completed_depth = depth
+                if time_limit is not None:
+                    self._deadline = start + time_limit
+                    if time.perf_counter() >= self._deadline:
+                        break
+        finally:
+            self._deadline = None
+        return best_move, best_value
+    
+    def _aspiration_search(self, board: Board, color: Color, depth: int,
+                           first_move: Optional[int], previous_value: float) -> Tuple[Optional[int], float]:
+        """Перебор корня в окне вокруг оценки прошлой итерации"""
+        alpha, beta = float('-inf'), float('inf')
+        window = self.aspiration_window
+        if window is not None and first_move is not None and math.isfinite(previous_value):
+            alpha, beta = previous_value - window, previous_value + window
+        while True:
+            move, value = self._search_root(board, color, depth, first_move, alpha, beta)
+            # Оценка за окном — лишь граница: перебираем заново с более широким окном
+            if value <= alpha and alpha > float('-inf'):
+                window *= ASPIRATION_GROWTH
+                alpha = value - window
+            elif value >= beta and beta < float('inf'):
+                window *= ASPIRATION_GROWTH
+                beta = value + window
+            else:
+                return move, value
+            self.aspiration_researches += 1
+    
+    def _attached(self, board: Board, search: Callable[[], Tuple[Optional[int], float]]) -> Tuple[Optional[int], float]:
+        # Табличные оценщики (с методом attach) ведут оценку на доске
+        # инкрементально; произвольные функции оценивают позицию целиком
+        attach = getattr(self.evaluation_function, 'attach', None)
+        if attach is None:
+            return search()
+        previous_table = board.eval_table
+        attach(board)
+        try:
+            return search()
+        finally:
+            board.set_eval_table(previous_table)
+    
+    def _search_root(self, board: Board, color: Color, depth: int,
+                     first_move: Optional[int] = None, alpha: float = float('-inf'),
+                     beta: float = float('inf')) -> Tuple[Optional[int], float]:
+        """
+        Перебирает ходы корня в окне (alpha, beta).
+        Возвращает лучший ход и его оценку для стороны color; из ходов
+        с равной оценкой выбирается первый.
+        """
+        best_move = None
+        best_value = float('-inf')
+        self._root_depth = depth
         
-        # Получаем все возможные ходы
-        moves = self._get_all_moves(board, color)
+        # Получаем все возможные ходы; лучший ход прошлой итерации — первым
+        moves = self._generate_moves(board, color, depth)
+        if self.move_ordering:
+            moves = self._order_moves(board, moves, color, 0, first_move)
+        elif first_move is not None and first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
         
+        opponent = Color.BLACK if color == Color.WHITE else Color.WHITE
         for move in moves:
-            # Делаем ход
-            from_pos, to_pos = move
-            captured_piece = board.get_piece(*to_pos)
-            board.move_piece(from_pos, to_pos)
-            
-            # Рекурсивно оцениваем позицию
-            value = -self._alpha_beta(board, -beta, -alpha, depth - 1, Color.BLACK if color == Color.WHITE else Color.WHITE)
-            
-            # Отменяем ход
-            board.move_piece(to_pos, from_pos)
-            if captured_piece:
-                board.board[to_pos[0]][to_pos[1]] = captured_piece
+            record = board.make_encoded_move(move)
+            value = self._search_move(board, alpha, beta, depth - 1, opponent, best_move is None)
+            board.unmake_move(record)
             
-            # Обновляем лучший ход
-            if value > best_value:
+            # Проигрышные ходы (-inf) тоже ходы: без хода партия проиграна
+            if value > best_value or best_move is None:
                 best_value = value
                 best_move = move
-            
-            # Обновляем альфа
-            alpha = max(alpha, value)
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
         
-        return best_move
+        return best_move, best_value
+    
+    def _search_move(self, board: Board, alpha: float, beta: float, depth: int,
+                     color: Color, first: bool) -> float:
+        """
+        Оценка сделанного хода для стороны, которая его сделала (color — соперник).
+        Первый ход перебирается с полным окном, остальные при PVS — с нулевым
+        окном (alpha, следующее за alpha число): такой перебор лишь доказывает,
+        что ход не лучше alpha, и повторяется с полным окном, только если
+        ход оказался лучше.
+        """
+        if first or not self.principal_variation:
+            return -self._negamax(board, -beta, -alpha, depth, color)
+        value = -self._negamax(board, -_next_above(alpha), -alpha, depth, color)
+        if alpha < value < beta:
+            self.pvs_researches += 1
+            value = -self._negamax(board, -beta, -alpha, depth, color)
+        return value
     
-    def _alpha_beta(self, board: Board, alpha: float, beta: float, depth: int, color: Color) -> float:
-        if depth == 0 or board.is_king_captured():
+    def _negamax(self, board: Board, alpha: float, beta: float, depth: int, color: Color) -> float:
+        """
+        Alpha-beta в форме negamax: оценка позиции для стороны color
+        (чей ход), как у функции оценки. Результат вне окна (alpha, beta)
+        — граница: не больше alpha или не меньше beta.
+        """
+        self.nodes += 1
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise _SearchTimeout()
+        
+        if board.is_king_captured():
             return self.evaluation_function(board, color)
         
-        moves = self._get_all_moves(board, color)
+        # Позиция из таблиц оценивается точно, в том числе на листьях
+        if self.tablebase is not None:
+            score = self.tablebase.score(board, color)
+            if score is not None:
+                return score
         
-        if color == Color.WHITE:
-            value = float('-inf')
-            for move in moves:
-                from_pos, to_pos = move
-                captured_piece = board.get_piece(*to_pos)
-                board.move_piece(from_pos, to_pos)
-                
-                value = max(value, self._alpha_beta(board, alpha, beta, depth - 1, Color.BLACK))
-                
-                board.move_piece(to_pos, from_pos)
-                if captured_piece:
-                    board.board[to_pos[0]][to_pos[1]] = captured_piece
-                
-                alpha = max(alpha, value)
+        if depth == 0:
+            if self.quiescence:
+                return self._quiescence(board, alpha, beta, color, 0)
+            return self.evaluation_function(board, color)
+        
+        # Таблица транспозиций: отсечение по сохраненной оценке не меньшей глубины
+        table = self.transposition_table
+        hash_move = None
+        if table is not None:
+            key = board.zobrist_key if color == board.side_to_move else board.zobrist_key ^ _OTHER_SIDE_KEY
+            entry = table.probe(key)
+            if entry is not None:
+                if entry.depth >= depth:
+                    if entry.bound == EXACT:
+                        return entry.score
+                    if entry.bound == LOWER_BOUND and entry.score >= beta:
+                        return entry.score
+                    if entry.bound == UPPER_BOUND and entry.score <= alpha:
+                        return entry.score
+                hash_move = entry.move
+        original_alpha = alpha
+        
+        moves = self._generate_moves(board, color, depth)
+        ply = self._root_depth - depth
+        if self.move_ordering:
+            moves = self._order_moves(board, moves, color, ply, hash_move)
+        elif hash_move is not None and hash_move in moves:
+            # Лучший ход из таблицы перебираем первым
+            moves.remove(hash_move)
+            moves.insert(0, hash_move)
+        
+        opponent = Color.BLACK if color == Color.WHITE else Color.WHITE
+        best_move = None
+        value = float('-inf')
+        for index, move in enumerate(moves):
+            record = board.make_encoded_move(move)
+            score = self._search_move(board, alpha, beta, depth - 1, opponent, index == 0)
+            board.unmake_move(record)
+            
+            if score > value:
+                value = score
+                best_move = move
+                alpha = max(alpha, score)
                 if alpha >= beta:
+                    self._record_cutoff(move, color, depth, ply, index)
                     break
-            return value
+        
+        if table is not None:
+            if value <= original_alpha:
+                table.store(key, depth, UPPER_BOUND, value, hash_move)
+            elif value >= beta:
+                table.store(key, depth, LOWER_BOUND, value, best_move)
+            else:
+                table.store(key, depth, EXACT, value, best_move)
+        return value
+    
+    def _order_moves(self, board: Board, moves: array, color: Color, ply: int,
+                     hash_move: Optional[int]) -> List[int]:
+        """Сортирует ходы по убыванию ожидаемой пользы (при равенстве — в порядке генерации)"""
+        killers = self._killers[ply] if ply < len(self._killers) else ()
+        history = self._history[color]
+        codes = board.codes
+        scores = {}
+        for move in moves:
+            if move == hash_move:
+                score = HASH_MOVE_SCORE
+            elif move & (MOVE_CAPTURE | MOVE_PROMOTION):
+                score = TACTICAL_SCORE
+                if move & MOVE_CAPTURE:
+                    victim = codes[move >> MOVE_TO_SHIFT & MOVE_SQUARE_MASK]
+                    attacker = codes[move & MOVE_SQUARE_MASK]
+                    score += _CODE_VALUES[victim] * 1000 - _CODE_VALUES[attacker]
+                if move & MOVE_PROMOTION:
+                    score += _PROMOTION_GAIN * 1000
+            elif move in killers:
+                score = KILLER_SCORE - killers.index(move)
+            else:
+                score = min(history[move & _MOVE_SQUARES], KILLER_SCORE - KILLERS_PER_PLY)
+            scores[move] = score
+        return sorted(moves, key=scores.__getitem__, reverse=True)
+    
+    def _record_cutoff(self, move: int, color: Color, depth: int, ply: int, index: int):
+        """Запоминает тихий ход, вызвавший отсечение, в убийцах и истории"""
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if not self.move_ordering or move & (MOVE_CAPTURE | MOVE_PROMOTION):
+            return
+        while len(self._killers) <= ply:
+            self._killers.append([])
+        killers = self._killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLERS_PER_PLY:]
+        self._history[color][move & _MOVE_SQUARES] += depth * depth
+    
+    def _quiescence(self, board: Board, alpha: float, beta: float, color: Color, ply: int) -> float:
+        """
+        Перебор взятий и превращений до спокойной позиции. Как и функция
+        оценки, возвращает оценку для стороны color (внутри — negamax).
+        Сторона может не брать (stand pat — статическая оценка); взятие,
+        которое даже с запасом delta_margin не поднимает оценку до alpha,
+        пропускается. Если король стороны под боем, stand pat нет
+        и перебираются все ходы (первые MAX_QUIESCENCE_EVASION_PLY полуходов).
+        """
+        self.quiescence_nodes += 1
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise _SearchTimeout()
+        
+        if board.is_king_captured():
+            return self.evaluation_function(board, color)
+        if self.tablebase is not None:
+            score = self.tablebase.score(board, color)
+            if score is not None:
+                return score
+        
+        evading = ply < MAX_QUIESCENCE_EVASION_PLY and board.is_king_under_attack(color)
+        if evading:
+            best_value = float('-inf')
         else:
-            value = float('inf')
-            for move in moves:
-                from_pos, to_pos = move
-                captured_piece = board.get_piece(*to_pos)
-                board.move_piece(from_pos, to_pos)
-                
-                value = min(value, self._alpha_beta(board, alpha, beta, depth - 1, Color.WHITE))
-                
-                board.move_piece(to_pos, from_pos)
-                if captured_piece:
-                    board.board[to_pos[0]][to_pos[1]] = captured_piece
-                
-                beta = min(beta, value)
+            best_value = self.evaluation_function(board, color)
+            if best_value >= beta:
+                return best_value
+            alpha = max(alpha, best_value)
+        stand_pat = best_value
+        
+        while len(self._quiescence_buffers) <= ply:
+            self._quiescence_buffers.append(new_move_buffer())
+        moves = board.generate_moves(color, self._quiescence_buffers[ply])
+        opponent = Color.BLACK if color == Color.WHITE else Color.WHITE
+        for move, gain in self._tactical_moves(board, moves, evading):
+            # Delta pruning; взятие короля не отсекается
+            if (not evading and self.delta_margin is not None and gain < self._king_value
+                    and stand_pat + gain + self.delta_margin <= alpha):
+                continue
+            record = board.make_encoded_move(move)
+            score = -self._quiescence(board, -beta, -alpha, opponent, ply + 1)
+            board.unmake_move(record)
+            
+            if score > best_value:
+                best_value = score
+                alpha = max(alpha, score)
                 if alpha >= beta:
                     break
-            return value
+        return best_value
     
-    def _get_all_moves(self, board: Board, color: Color) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-        moves = []
-        for row in range(board.size):
-            for col in range(board.size):
-                piece = board.get_piece(row, col)
-                if piece and piece.color == color:
-                    legal_moves = board.get_legal_moves(row, col)
-                    moves.extend([((row, col), move) for move in legal_moves])
-        return moves 
\ No newline at end of file
+    def _tactical_moves(self, board: Board, moves: array, all_moves: bool) -> List[Tuple[int, float]]:
+        """
+        Взятия и превращения (при all_moves — все ходы) с выигрышем материала,
+        по убыванию MVV-LVA
+        """
+        codes = board.codes
+        result = []
+        for move in moves:
+            if not move & (MOVE_CAPTURE | MOVE_PROMOTION):
+                if all_moves:
+                    result.append((0, move, 0.0))
+                continue
+            order = 0
+            gain = 0.0
+            if move & MOVE_CAPTURE:
+                victim = codes[move >> MOVE_TO_SHIFT & MOVE_SQUARE_MASK]
+                attacker = codes[move & MOVE_SQUARE_MASK]
+                order = _CODE_VALUES[victim] * 1000 - _CODE_VALUES[attacker]
+                gain = self._gain_values[victim]
+            if move & MOVE_PROMOTION:
+                order += _PROMOTION_GAIN * 1000
+                gain += self._promotion_gain
+            result.append((order, move, gain))
+        result.sort(key=lambda item: item[0], reverse=True)
+        return [(move, gain) for _, move, gain in result]
+    
+    def _generate_moves(self, board: Board, color: Color, depth: int) -> array:
+        while len(self._move_buffers) <= depth:
+            self._move_buffers.append(new_move_buffer())
+        return board.generate_moves(color, self._move_buffers[depth])
+
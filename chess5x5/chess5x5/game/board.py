@@ -1,27 +1,702 @@
+import random
+from array import array
+from bisect import insort
 from enum import Enum
-from typing import List, Tuple, Optional
+from typing import Dict, Iterator, List, NamedTuple, Sequence, Tuple, Optional
 
 class PieceType(Enum):
     PAWN = "P"
     ROOK = "R"
     BISHOP = "B"
     KING = "K"
+
+    # Члены перечисления — синглтоны, поэтому хеш по идентичности корректен
+    # и, в отличие от Enum.__hash__, не вызывает Python-функцию при каждом
+    # обращении к словарям, ключами которых являются фигуры и цвета
+    __hash__ = object.__hash__
     
 
 class Color(Enum):
     WHITE = "W"
     BLACK = "B"
 
+    __hash__ = object.__hash__
+
 class Piece:
-    def __init__(self, piece_type: PieceType, color: Color):
-        self.type = piece_type
-        self.color = color
+    """
+    Неизменяемая фигура-приспособленец: на каждую пару (тип, цвет)
+    существует ровно один экземпляр, и Piece(PieceType.ROOK, Color.WHITE)
+    всегда возвращает один и тот же объект. Поэтому фигуры можно
+    сравнивать через is, а копии доски не копируют сами фигуры.
+    """
+    __slots__ = ('type', 'color')
+    _instances: Dict[Tuple[PieceType, Color], 'Piece'] = {}
+
+    def __new__(cls, piece_type: PieceType, color: Color):
+        try:
+            return cls._instances[(piece_type, color)]
+        except KeyError:
+            pass
+        if not isinstance(piece_type, PieceType) or not isinstance(color, Color):
+            raise TypeError(f"Некорректная фигура: {piece_type!r}, {color!r}")
+        piece = object.__new__(cls)
+        object.__setattr__(piece, 'type', piece_type)
+        object.__setattr__(piece, 'color', color)
+        cls._instances[(piece_type, color)] = piece
+        return piece
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Piece неизменяем")
+
+    def __delattr__(self, name):
+        raise AttributeError("Piece неизменяем")
+
+    def __copy__(self) -> 'Piece':
+        return self
+
+    def __deepcopy__(self, memo) -> 'Piece':
+        return self
+
+    def __reduce__(self):
+        return Piece, (self.type, self.color)
+
+    def __repr__(self) -> str:
+        return f"Piece({self.type}, {self.color})"
+
+
+# Обращение к члену перечисления через класс (PieceType.PAWN) в Python 3.11
+# заметно дороже чтения глобальной переменной, поэтому во внутренних циклах
+# используются эти ссылки
+_PAWN = PieceType.PAWN
+_ROOK = PieceType.ROOK
+_BISHOP = PieceType.BISHOP
+_KING = PieceType.KING
+
+OPPONENT: Dict[Color, Color] = {Color.WHITE: Color.BLACK, Color.BLACK: Color.WHITE}
+
+BOARD_SIZE = 5
+NUM_SQUARES = BOARD_SIZE * BOARD_SIZE
+
+
+# Случайные 64-битные ключи Зобриста: по ключу на (тип, цвет, клетку)
+# и ключ очереди хода черных. Генератор с фиксированным зерном дает
+# одинаковые ключи во всех процессах.
+_zobrist_random = random.Random(0x5C5)
+ZOBRIST_PIECE_KEYS: Dict[Tuple[PieceType, Color], List[int]] = {
+    (piece_type, color): [_zobrist_random.getrandbits(64) for _ in range(NUM_SQUARES)]
+    for piece_type in PieceType for color in Color
+}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+del _zobrist_random
+
+
+def square_index(row: int, col: int) -> int:
+    """Номер клетки (бит в маске) по строке и столбцу"""
+    return row * BOARD_SIZE + col
+
+
+def square_position(square: int) -> Tuple[int, int]:
+    """Строка и столбец по номеру клетки"""
+    return divmod(square, BOARD_SIZE)
+
+
+def iter_squares(mask: int) -> Iterator[int]:
+    """Перебирает номера установленных битов маски по возрастанию"""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+# Предвычисленные таблицы ходов для каждой из 25 клеток.
+# Порядок направлений совпадает с прежним обходом в get_legal_moves,
+# поэтому порядок генерируемых ходов не меняется.
+ROOK_DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+KING_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+PAWN_DIRECTION = {Color.WHITE: -1, Color.BLACK: 1}
+PAWN_START_ROW = {Color.WHITE: BOARD_SIZE - 2, Color.BLACK: 1}
+PROMOTION_ROW = {Color.WHITE: 0, Color.BLACK: BOARD_SIZE - 1}
+PROMOTION_PIECES = {color: Piece(PieceType.ROOK, color) for color in Color}
+
+# Однобайтовые коды фигур для сериализации: 0 — пустая клетка
+CODE_PIECES: Tuple[Optional[Piece], ...] = (None,) + tuple(
+    Piece(piece_type, color) for color in Color for piece_type in PieceType
+)
+PIECE_CODES: Dict[Piece, int] = {piece: code for code, piece in enumerate(CODE_PIECES) if piece}
+# Ключ словарей bitboards и piece_counts и ключи Зобриста по коду фигуры
+CODE_KEYS: Tuple[Optional[Tuple[PieceType, Color]], ...] = tuple(
+    (piece.type, piece.color) if piece else None for piece in CODE_PIECES
+)
+ZOBRIST_CODE_KEYS: Tuple[Optional[List[int]], ...] = tuple(
+    ZOBRIST_PIECE_KEYS[piece_key] if piece_key else None for piece_key in CODE_KEYS
+)
+SIDE_TO_MOVE_BIT = 0x80  # старший бит первого байта — ход черных
+
+# Буквы фигур для текстовой записи: заглавные — белые, строчные — черные
+PIECE_LETTERS: Dict[Piece, str] = {
+    piece: piece.type.value if piece.color == Color.WHITE else piece.type.value.lower()
+    for piece in CODE_PIECES if piece
+}
+LETTER_PIECES: Dict[str, Piece] = {letter: piece for piece, letter in PIECE_LETTERS.items()}
+START_FEN = "rbkbr/ppppp/5/PPPPP/RBKBR w"
+# Маска клеток горизонтали превращения для пешек каждого цвета
+PROMOTION_MASKS = {
+    color: ((1 << BOARD_SIZE) - 1) << (row * BOARD_SIZE) for color, row in PROMOTION_ROW.items()
+}
+
+SQUARE_POSITIONS: Tuple[Tuple[int, int], ...] = tuple(
+    divmod(square, BOARD_SIZE) for square in range(NUM_SQUARES)
+)
+
+
+def _on_board(row: int, col: int) -> bool:
+    return 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE
+
+
+def _build_rays(directions) -> Tuple[Tuple[Tuple[int, ...], ...], ...]:
+    """Для каждой клетки — непустые лучи в заданных направлениях, от клетки наружу"""
+    table = []
+    for row, col in SQUARE_POSITIONS:
+        rays = []
+        for drow, dcol in directions:
+            ray = []
+            current_row, current_col = row + drow, col + dcol
+            while _on_board(current_row, current_col):
+                ray.append(square_index(current_row, current_col))
+                current_row += drow
+                current_col += dcol
+            if ray:
+                rays.append(tuple(ray))
+        table.append(tuple(rays))
+    return tuple(table)
+
+
+def _build_steps(directions) -> Tuple[Tuple[int, ...], ...]:
+    """Для каждой клетки — соседние клетки в заданных направлениях"""
+    return tuple(
+        tuple(square_index(row + drow, col + dcol)
+              for drow, dcol in directions if _on_board(row + drow, col + dcol))
+        for row, col in SQUARE_POSITIONS
+    )
+
+
+def _build_pawn_pushes(color: Color) -> Tuple[Tuple[int, ...], ...]:
+    """Для каждой клетки — ход пешки вперед и двойной ход с начальной горизонтали"""
+    direction = PAWN_DIRECTION[color]
+    table = []
+    for row, col in SQUARE_POSITIONS:
+        pushes = []
+        if _on_board(row + direction, col):
+            pushes.append(square_index(row + direction, col))
+            if row == PAWN_START_ROW[color]:
+                pushes.append(square_index(row + 2 * direction, col))
+        table.append(tuple(pushes))
+    return tuple(table)
+
+
+def _build_pawn_captures(color: Color) -> Tuple[Tuple[int, ...], ...]:
+    direction = PAWN_DIRECTION[color]
+    return _build_steps(((direction, -1), (direction, 1)))
+
+
+def _mask_of(squares) -> int:
+    mask = 0
+    for square in squares:
+        mask |= 1 << square
+    return mask
+
+
+ROOK_RAYS = _build_rays(ROOK_DIRECTIONS)
+BISHOP_RAYS = _build_rays(BISHOP_DIRECTIONS)
+KING_TARGETS = _build_steps(KING_DIRECTIONS)
+KING_ATTACKS: Tuple[int, ...] = tuple(_mask_of(targets) for targets in KING_TARGETS)
+PAWN_PUSHES: Dict[Color, Tuple[Tuple[int, ...], ...]] = {
+    color: _build_pawn_pushes(color) for color in Color
+}
+PAWN_CAPTURES: Dict[Color, Tuple[Tuple[int, ...], ...]] = {
+    color: _build_pawn_captures(color) for color in Color
+}
+# Маска клеток, которые бьет пешка данного цвета с данной клетки
+PAWN_ATTACKS: Dict[Color, Tuple[int, ...]] = {
+    color: tuple(_mask_of(targets) for targets in PAWN_CAPTURES[color]) for color in Color
+}
+
+
+# Компактное кодирование хода в int:
+# биты 0-4 — клетка откуда, биты 5-9 — клетка куда,
+# бит 10 — превращение пешки, бит 11 — взятие
+MOVE_SQUARE_MASK = 0x1F
+MOVE_TO_SHIFT = 5
+MOVE_PROMOTION = 1 << 10
+MOVE_CAPTURE = 1 << 11
+
+
+def encode_move(from_square: int, to_square: int,
+                promotion: bool = False, capture: bool = False) -> int:
+    """Упаковывает ход в int"""
+    move = from_square | to_square << MOVE_TO_SHIFT
+    if promotion:
+        move |= MOVE_PROMOTION
+    if capture:
+        move |= MOVE_CAPTURE
+    return move
+
+
+def move_from_square(move: int) -> int:
+    return move & MOVE_SQUARE_MASK
+
+
+def move_to_square(move: int) -> int:
+    return move >> MOVE_TO_SHIFT & MOVE_SQUARE_MASK
+
+
+def decode_move(move: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Переводит закодированный ход в вид ((from_row, from_col), (to_row, to_col))"""
+    return (SQUARE_POSITIONS[move & MOVE_SQUARE_MASK],
+            SQUARE_POSITIONS[move >> MOVE_TO_SHIFT & MOVE_SQUARE_MASK])
+
+
+def new_move_buffer() -> array:
+    """Буфер для generate_moves: массив 16-битных ходов, переиспользуемый между вызовами"""
+    return array('H')
+
+
+class MoveRecord(NamedTuple):
+    """Запись для отмены хода: что стояло на клетках до хода"""
+    from_square: int
+    to_square: int
+    piece: Optional[Piece]
+    captured: Optional[Piece]
+    promoted: bool
+    key_delta: int  # zobrist_key до хода XOR zobrist_key после хода
+
+
+class AttackMaps:
+    """
+    Карты атак позиции (см. Board.attack_maps).
+    attack_counts[color][square] — сколько фигур цвета color бьют клетку;
+    если на клетке своя фигура, это число ее защитников.
+    attack_masks[color] — маска всех клеток, которые бьет цвет color.
+    mobility[square] — число ходов фигуры на клетке (0 для пустой),
+    total_mobility[color] — сумма ходов всех фигур цвета.
+    """
+
+    __slots__ = ('key', 'attack_counts', 'attack_masks', 'mobility', 'total_mobility', '_squares')
+
+    def __init__(self, board: 'Board'):
+        self.key = board.zobrist_key
+        self._squares = board._squares[:]
+        self.attack_counts: Dict[Color, List[int]] = {}
+        self.attack_masks: Dict[Color, int] = {}
+        self.total_mobility: Dict[Color, int] = {}
+        self.mobility: List[int] = [0] * NUM_SQUARES
+        squares = board._squares
+        occupied = board.occupied
+        for color in (Color.WHITE, Color.BLACK):
+            counts = [0] * NUM_SQUARES
+            own = board.occupancy[color]
+            enemy = occupied & ~own
+            attacked = 0
+            total = 0
+            for square in board.piece_lists[color]:
+                piece_type = squares[square].type
+                if piece_type is _PAWN:
+                    covered = PAWN_CAPTURES[color][square]
+                    moves = 0
+                    for target in PAWN_PUSHES[color][square]:
+                        if occupied >> target & 1:
+                            break
+                        moves += 1
+                    for target in covered:
+                        if enemy >> target & 1:
+                            moves += 1
+                elif piece_type is _KING:
+                    covered = KING_TARGETS[square]
+                    moves = sum(1 for target in covered if not own >> target & 1)
+                else:
+                    # Луч бьет клетки до первой фигуры включительно
+                    covered = []
+                    rays = ROOK_RAYS[square] if piece_type is _ROOK else BISHOP_RAYS[square]
+                    for ray in rays:
+                        for target in ray:
+                            covered.append(target)
+                            if occupied >> target & 1:
+                                break
+                    moves = sum(1 for target in covered if not own >> target & 1)
+                for target in covered:
+                    counts[target] += 1
+                    attacked |= 1 << target
+                self.mobility[square] = moves
+                total += moves
+            self.attack_counts[color] = counts
+            self.attack_masks[color] = attacked
+            self.total_mobility[color] = total
+
+    def attackers(self, row: int, col: int, color: Color) -> int:
+        """Сколько фигур цвета color бьют клетку (row, col)"""
+        return self.attack_counts[color][row * BOARD_SIZE + col]
+
+    def is_attacked(self, row: int, col: int, by_color: Color) -> bool:
+        return self.attack_masks[by_color] >> (row * BOARD_SIZE + col) & 1 == 1
+
+    def defenders(self, row: int, col: int) -> int:
+        """Сколько своих фигур защищают фигуру на клетке (0 для пустой клетки)"""
+        piece = self._squares[row * BOARD_SIZE + col]
+        if piece is None:
+            return 0
+        return self.attack_counts[piece.color][row * BOARD_SIZE + col]
+
+    def piece_mobility(self, row: int, col: int) -> int:
+        """Число ходов фигуры на клетке (row, col)"""
+        return self.mobility[row * BOARD_SIZE + col]
+
+
+class BoardRow:
+    """
+    Строка совместимого представления board[row][col].
+    Чтение берется из массива клеток, запись обновляет битовые маски.
+    """
+    __slots__ = ('_board', '_offset')
+
+    def __init__(self, board: 'Board', row: int):
+        self._board = board
+        self._offset = row * BOARD_SIZE
+
+    def _square(self, col: int) -> int:
+        if col < 0:
+            col += BOARD_SIZE
+        if not 0 <= col < BOARD_SIZE:
+            raise IndexError("board column index out of range")
+        return self._offset + col
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return self._board._squares[self._offset:self._offset + BOARD_SIZE][col]
+        return self._board._squares[self._square(col)]
+
+    def __setitem__(self, col: int, piece: Optional['Piece']):
+        self._board._set_square(self._square(col), piece)
+
+    def __len__(self) -> int:
+        return BOARD_SIZE
+
+    def __iter__(self) -> Iterator[Optional['Piece']]:
+        return iter(self._board._squares[self._offset:self._offset + BOARD_SIZE])
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class BoardView:
+    """
+    Представление доски в виде списка строк (board.board[row][col]).
+    Нужно для совместимости с функциями оценки, написанными под список списков.
+    """
+    __slots__ = ('_board',)
+
+    def __init__(self, board: 'Board'):
+        self._board = board
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [BoardRow(self._board, r) for r in range(BOARD_SIZE)][row]
+        if row < 0:
+            row += BOARD_SIZE
+        if not 0 <= row < BOARD_SIZE:
+            raise IndexError("board row index out of range")
+        return BoardRow(self._board, row)
+
+    def __setitem__(self, row: int, pieces):
+        target = self[row]
+        for col, piece in enumerate(pieces):
+            target[col] = piece
+
+    def __len__(self) -> int:
+        return BOARD_SIZE
+
+    def __iter__(self) -> Iterator[BoardRow]:
+        return (BoardRow(self._board, row) for row in range(BOARD_SIZE))
+
+    def __eq__(self, other) -> bool:
+        return [list(row) for row in self] == [list(row) for row in other]
+
+    def __repr__(self) -> str:
+        return repr([list(row) for row in self])
+
 
 class Board:
+    """
+    Доска 5x5 на битовых масках.
+    Для каждой пары (тип фигуры, цвет) хранится 25-битная маска, отдельно
+    хранятся маски занятости по цветам и общая. Массив клеток _squares
+    дублирует маски и отдает объекты Piece для get_piece и board[row][col].
+    Ключ Зобриста zobrist_key обновляется при каждом изменении клетки
+    и смене очереди хода.
+    Если задана таблица оценки (set_eval_table), так же обновляется
+    и оценка позиции eval_score.
+    """
+
+    # Таблица оценки по клеткам: значение фигуры с кодом code на клетке
+    # square лежит в eval_table[code * NUM_SQUARES + square]
+    eval_table: Optional[Sequence[float]] = None
+    eval_score: float = 0.0
+    # Последние посчитанные карты атак (см. attack_maps)
+    _attack_maps: Optional[AttackMaps] = None
+
     def __init__(self):
-        self.size = 5
-        self.board = [[None for _ in range(self.size)] for _ in range(self.size)]
+        self.size = BOARD_SIZE
+        self.side_to_move = Color.WHITE
+        self._clear()
         self._initialize_board()
+
+    def _clear(self):
+        self._load_codes(bytearray(NUM_SQUARES))
+
+    def _load_codes(self, codes: bytearray):
+        """
+        Ставит позицию целиком по кодам фигур (см. PIECE_CODES) и пересчитывает
+        маски, списки фигур, счетчики и ключ
+        """
+        try:
+            self._squares: List[Optional[Piece]] = [CODE_PIECES[code] for code in codes]
+        except IndexError:
+            raise ValueError("Некорректный код фигуры") from None
+        # Коды фигур по клеткам — готовое тело to_bytes
+        self._codes = codes
+        masks = [0] * len(CODE_PIECES)
+        key = ZOBRIST_BLACK_TO_MOVE if self.side_to_move is Color.BLACK else 0
+        for square, code in enumerate(codes):
+            if code:
+                masks[code] |= 1 << square
+                key ^= ZOBRIST_CODE_KEYS[code][square]
+        self.zobrist_key = key
+        if self.eval_table is not None:
+            self.eval_score = self._score_codes(self.eval_table)
+
+        self.bitboards: Dict[Tuple[PieceType, Color], int] = {}
+        self.piece_counts: Dict[Tuple[PieceType, Color], int] = {}
+        self.occupancy: Dict[Color, int] = {Color.WHITE: 0, Color.BLACK: 0}
+        for code, piece_key in enumerate(CODE_KEYS):
+            if piece_key is not None:
+                mask = masks[code]
+                self.bitboards[piece_key] = mask
+                self.piece_counts[piece_key] = bin(mask).count("1")
+                self.occupancy[piece_key[1]] |= mask
+        self.occupied = self.occupancy[Color.WHITE] | self.occupancy[Color.BLACK]
+        self.king_squares: Dict[Color, Optional[int]] = {}
+        # Занятые клетки каждого цвета по возрастанию (в порядке обхода доски)
+        self.piece_lists: Dict[Color, List[int]] = {}
+        for color in (Color.WHITE, Color.BLACK):
+            king_mask = self.bitboards[(_KING, color)]
+            self.king_squares[color] = (king_mask & -king_mask).bit_length() - 1 if king_mask else None
+            self.piece_lists[color] = list(iter_squares(self.occupancy[color]))
+        self.undo_stack: List[MoveRecord] = []
+
+    def copy(self) -> 'Board':
+        """
+        Быстрая копия доски. Фигуры неизменяемы и общие, поэтому
+        копируются только массив клеток, маски и списки.
+        """
+        board = Board.__new__(Board)
+        board.size = self.size
+        board.side_to_move = self.side_to_move
+        board._squares = self._squares[:]
+        board._codes = self._codes[:]
+        board.bitboards = self.bitboards.copy()
+        board.occupancy = self.occupancy.copy()
+        board.occupied = self.occupied
+        board.king_squares = self.king_squares.copy()
+        board.piece_lists = {color: squares[:] for color, squares in self.piece_lists.items()}
+        board.piece_counts = self.piece_counts.copy()
+        board.undo_stack = self.undo_stack[:]
+        board.zobrist_key = self.zobrist_key
+        if self.eval_table is not None:
+            board.eval_table = self.eval_table
+            board.eval_score = self.eval_score
+        return board
+
+    def __copy__(self) -> 'Board':
+        return self.copy()
+
+    def __reduce__(self):
+        # Pickle хранит только 25 байт позиции (история ходов не сохраняется)
+        return Board.from_bytes, (self.to_bytes(),)
+
+    def to_bytes(self) -> bytes:
+        """
+        Позиция в 25 байтах: по байту-коду фигуры на клетку (см. PIECE_CODES),
+        старший бит первого байта — ход черных.
+        """
+        if self.side_to_move is Color.BLACK:
+            data = bytearray(self._codes)
+            data[0] |= SIDE_TO_MOVE_BIT
+            return bytes(data)
+        return bytes(self._codes)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Board':
+        """Восстанавливает доску из to_bytes"""
+        if len(data) != NUM_SQUARES:
+            raise ValueError(f"Ожидается {NUM_SQUARES} байт, получено {len(data)}")
+        codes = bytearray(data)
+        board = cls.__new__(cls)
+        board.size = BOARD_SIZE
+        board.side_to_move = Color.BLACK if codes[0] & SIDE_TO_MOVE_BIT else Color.WHITE
+        codes[0] &= ~SIDE_TO_MOVE_BIT
+        board._load_codes(codes)
+        return board
+
+    def to_fen(self) -> str:
+        """Текстовая запись позиции: "rbkbr/ppppp/5/PPPPP/RBKBR w" """
+        rows = []
+        for row in range(BOARD_SIZE):
+            text = ""
+            empty = 0
+            for piece in self._squares[row * BOARD_SIZE:(row + 1) * BOARD_SIZE]:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += PIECE_LETTERS[piece]
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        return "/".join(rows) + (" w" if self.side_to_move is Color.WHITE else " b")
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'Board':
+        """Восстанавливает доску из to_fen; очередь хода можно не указывать (ход белых)"""
+        parts = fen.split()
+        if not parts or len(parts) > 2:
+            raise ValueError(f"Некорректная запись позиции: {fen!r}")
+        rows = parts[0].split("/")
+        if len(rows) != BOARD_SIZE:
+            raise ValueError(f"Ожидается {BOARD_SIZE} горизонталей: {fen!r}")
+        codes = bytearray()
+        for text in rows:
+            row_codes = bytearray()
+            for letter in text:
+                if letter.isdigit():
+                    row_codes.extend(bytes(int(letter)))
+                elif letter in LETTER_PIECES:
+                    row_codes.append(PIECE_CODES[LETTER_PIECES[letter]])
+                else:
+                    raise ValueError(f"Некорректная горизонталь {text!r}: {fen!r}")
+            if len(row_codes) != BOARD_SIZE:
+                raise ValueError(f"Некорректная горизонталь {text!r}: {fen!r}")
+            codes.extend(row_codes)
+        board = cls.__new__(cls)
+        board.size = BOARD_SIZE
+        board.side_to_move = Color.WHITE
+        if len(parts) == 2:
+            if parts[1] not in ("w", "b"):
+                raise ValueError(f"Некорректная очередь хода: {fen!r}")
+            board.side_to_move = Color.WHITE if parts[1] == "w" else Color.BLACK
+        board._load_codes(codes)
+        return board
+
+    def __deepcopy__(self, memo) -> 'Board':
+        return self.copy()
+
+    @property
+    def codes(self) -> bytearray:
+        """Коды фигур по клеткам (см. PIECE_CODES) без копирования; только для чтения"""
+        return self._codes
+
+    @property
+    def board(self) -> BoardView:
+        return BoardView(self)
+
+    @board.setter
+    def board(self, rows):
+        # Полная замена позиции списком списков (как в старом API)
+        codes = bytearray(NUM_SQUARES)
+        for row, pieces in enumerate(rows):
+            for col, piece in enumerate(pieces):
+                if piece is not None:
+                    codes[square_index(row, col)] = PIECE_CODES[piece]
+        self._load_codes(codes)
+
+    def _set_square(self, square: int, piece: Optional[Piece]):
+        """
+        Ставит фигуру (или None) на клетку и обновляет маски, ключ,
+        списки фигур, счетчики материала и клетки королей
+        """
+        bit = 1 << square
+        old_piece = self._squares[square]
+        code = PIECE_CODES[piece] if piece is not None else 0
+        table = self.eval_table
+        if table is not None:
+            self.eval_score += table[code * NUM_SQUARES + square] - \
+                table[self._codes[square] * NUM_SQUARES + square]
+        if old_piece is not None:
+            key = (old_piece.type, old_piece.color)
+            self.bitboards[key] &= ~bit
+            self.occupancy[old_piece.color] &= ~bit
+            self.occupied &= ~bit
+            self.zobrist_key ^= ZOBRIST_PIECE_KEYS[key][square]
+            self.piece_lists[old_piece.color].remove(square)
+            self.piece_counts[key] -= 1
+            if old_piece.type is _KING:
+                king_mask = self.bitboards[key]
+                self.king_squares[old_piece.color] = \
+                    (king_mask & -king_mask).bit_length() - 1 if king_mask else None
+        self._squares[square] = piece
+        self._codes[square] = code
+        if piece is not None:
+            key = (piece.type, piece.color)
+            self.bitboards[key] |= bit
+            self.occupancy[piece.color] |= bit
+            self.occupied |= bit
+            self.zobrist_key ^= ZOBRIST_PIECE_KEYS[key][square]
+            insort(self.piece_lists[piece.color], square)
+            self.piece_counts[key] += 1
+            if piece.type is _KING:
+                king_mask = self.bitboards[key]
+                self.king_squares[piece.color] = (king_mask & -king_mask).bit_length() - 1
+
+    def _switch_side(self):
+        self.side_to_move = Color.BLACK if self.side_to_move == Color.WHITE else Color.WHITE
+        self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+
+    def set_side_to_move(self, color: Color):
+        """Задает очередь хода (для позиций, собранных вручную)"""
+        if color != self.side_to_move:
+            self._switch_side()
+
+    def set_eval_table(self, table: Optional[Sequence[float]]):
+        """
+        Включает инкрементальную оценку: дальше eval_score меняется при каждом
+        изменении клетки, в том числе в make_move и unmake_move.
+        Таблица — плоская последовательность длины len(CODE_PIECES) * NUM_SQUARES
+        с нулями для пустой клетки. None выключает оценку.
+        """
+        if table is not None and len(table) != len(CODE_PIECES) * NUM_SQUARES:
+            raise ValueError("Некорректный размер таблицы оценки")
+        self.eval_table = table
+        self.eval_score = self._score_codes(table) if table is not None else 0.0
+
+    def _score_codes(self, table: Sequence[float]) -> float:
+        """Считает оценку по таблице с нуля"""
+        score = 0.0
+        for square, code in enumerate(self._codes):
+            if code:
+                score += table[code * NUM_SQUARES + square]
+        return score
+
+    def compute_zobrist_key(self) -> int:
+        """Считает ключ позиции с нуля (для проверки инкрементального ключа)"""
+        key = ZOBRIST_BLACK_TO_MOVE if self.side_to_move == Color.BLACK else 0
+        for square, piece in enumerate(self._squares):
+            if piece is not None:
+                key ^= ZOBRIST_PIECE_KEYS[(piece.type, piece.color)][square]
+        return key
     
     def _initialize_board(self):
         # Инициализация начальной позиции
@@ -45,129 +720,252 @@ class Board:
     
     def get_piece(self, row: int, col: int) -> Optional[Piece]:
         if 0 <= row < self.size and 0 <= col < self.size:
-            return self.board[row][col]
+            return self._squares[row * BOARD_SIZE + col]
         return None
     
     def move_piece(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]):
+        """
+        Переставляет фигуру (с превращением пешки), как в старом API: ход
+        не записывается в undo_stack и очередь хода не меняется. Функции
+        оценки могут так пробовать ходы и возвращать позицию обратно.
+        """
+        from_row, from_col = from_pos
+        to_row, to_col = to_pos
+        self._place(from_row * BOARD_SIZE + from_col, to_row * BOARD_SIZE + to_col)
+
+    def make_move(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> MoveRecord:
+        """
+        Делает ход, передает очередь хода сопернику и кладет запись
+        для отмены в undo_stack.
+        Возвращает эту запись, ее можно передать в unmake_move.
+        """
         from_row, from_col = from_pos
         to_row, to_col = to_pos
-        piece = self.board[from_row][from_col]
+        return self._make(from_row * BOARD_SIZE + from_col, to_row * BOARD_SIZE + to_col)
+
+    def make_encoded_move(self, move: int) -> MoveRecord:
+        """То же, что make_move, для хода из generate_moves"""
+        return self._make(move & MOVE_SQUARE_MASK, move >> MOVE_TO_SHIFT & MOVE_SQUARE_MASK)
+
+    def _place(self, from_square: int, to_square: int) -> bool:
+        """Переставляет фигуру; возвращает True, если пешка превратилась"""
+        piece = self._squares[from_square]
+        placed = piece
+        promoted = False
         
         # Проверяем превращение пешки
-        if piece and piece.type == PieceType.PAWN:
-            if (piece.color == Color.WHITE and to_row == 0) or \
-               (piece.color == Color.BLACK and to_row == self.size - 1):
+        if piece and piece.type is _PAWN:
+            if PROMOTION_MASKS[piece.color] >> to_square & 1:
                 # Превращаем пешку в ладью
-                self.board[to_row][to_col] = Piece(PieceType.ROOK, piece.color)
-            else:
-                self.board[to_row][to_col] = piece
-        else:
-            self.board[to_row][to_col] = piece
+                placed = PROMOTION_PIECES[piece.color]
+                promoted = True
             
-        self.board[from_row][from_col] = None
+        self._set_square(from_square, None)
+        self._set_square(to_square, placed)
+        return promoted
+
+    def _make(self, from_square: int, to_square: int) -> MoveRecord:
+        piece = self._squares[from_square]
+        captured = self._squares[to_square]
+        key_before = self.zobrist_key
+        promoted = self._place(from_square, to_square)
+        self._switch_side()
+
+        record = MoveRecord(from_square, to_square, piece, captured, promoted,
+                            key_before ^ self.zobrist_key)
+        self.undo_stack.append(record)
+        return record
+
+    def unmake_move(self, record: Optional[MoveRecord] = None) -> MoveRecord:
+        """
+        Отменяет последний сделанный ход за O(1).
+        Превращенная ладья снова становится пешкой, взятая фигура возвращается.
+        """
+        if not self.undo_stack:
+            raise ValueError("Нет ходов для отмены")
+        if record is not None and self.undo_stack[-1] is not record:
+            raise ValueError("Отменять можно только последний сделанный ход")
+        record = self.undo_stack.pop()
+        self._set_square(record.to_square, record.captured)
+        self._set_square(record.from_square, record.piece)
+        self._switch_side()
+        return record
     
-    def is_king_under_attack(self, color: Color) -> bool:
-        # Находим позицию короля
-        king_pos = None
-        for row in range(self.size):
-            for col in range(self.size):
-                piece = self.board[row][col]
-                if piece and piece.type == PieceType.KING and piece.color == color:
-                    king_pos = (row, col)
-                    break
-            if king_pos:
-                break
-        
-        if not king_pos:
+    def is_square_attacked(self, square: Tuple[int, int], by_color: Color) -> bool:
+        """
+        Проверяет, бьет ли хотя бы одна фигура цвета by_color клетку (row, col).
+        Поиск идет от самой клетки: по лучам ладьи и слона до первой фигуры
+        и по шаблонам короля и пешки.
+        """
+        row, col = square
+        if not (0 <= row < self.size and 0 <= col < self.size):
             return False
-            
-        # Проверяем атаки всех фигур противника
-        for row in range(self.size):
-            for col in range(self.size):
-                piece = self.board[row][col]
-                if piece and piece.color != color:
-                    moves = self.get_legal_moves(row, col)
-                    if king_pos in moves:
-                        return True
+        return self._is_attacked(row * BOARD_SIZE + col, by_color)
+
+    def _is_attacked(self, square: int, by_color: Color) -> bool:
+        bitboards = self.bitboards
+        # Пешка бьет клетку, если стоит там, куда била бы пешка соперника с этой клетки
+        if PAWN_ATTACKS[OPPONENT[by_color]][square] & bitboards[(_PAWN, by_color)]:
+            return True
+        if KING_ATTACKS[square] & bitboards[(_KING, by_color)]:
+            return True
+
+        occupied = self.occupied
+        rooks = bitboards[(_ROOK, by_color)]
+        if rooks:
+            for ray in ROOK_RAYS[square]:
+                for target in ray:
+                    if occupied >> target & 1:
+                        if rooks >> target & 1:
+                            return True
+                        break
+        bishops = bitboards[(_BISHOP, by_color)]
+        if bishops:
+            for ray in BISHOP_RAYS[square]:
+                for target in ray:
+                    if occupied >> target & 1:
+                        if bishops >> target & 1:
+                            return True
+                        break
         return False
 
+    def attack_maps(self) -> AttackMaps:
+        """
+        Карты атак, защит и мобильности текущей позиции.
+        Считаются при первом запросе за один проход по фигурам и запоминаются
+        до изменения позиции, поэтому несколько функций оценки (или несколько
+        вопросов одной функции) получают ответы за O(1).
+        """
+        maps = self._attack_maps
+        if maps is None or maps.key != self.zobrist_key:
+            maps = self._attack_maps = AttackMaps(self)
+        return maps
+
+    def is_king_under_attack(self, color: Color) -> bool:
+        king_square = self.king_squares[color]
+        if king_square is None:
+            return False
+        return self._is_attacked(king_square, OPPONENT[color])
+
     def is_king_captured(self) -> bool:
-        white_king = False
-        black_king = False
-        
-        # Проверяем наличие королей
-        for row in range(self.size):
-            for col in range(self.size):
-                piece = self.board[row][col]
-                if piece and piece.type == PieceType.KING:
-                    if piece.color == Color.WHITE:
-                        white_king = True
-                    else:
-                        black_king = True
-        
         # Если хотя бы один король отсутствует
-        return not white_king or not black_king
+        return self.king_squares[Color.WHITE] is None or self.king_squares[Color.BLACK] is None
+
+    def get_pieces(self, color: Color) -> List[Tuple[Tuple[int, int], Piece]]:
+        """Фигуры цвета color с их клетками в порядке обхода доски"""
+        squares = self._squares
+        return [(SQUARE_POSITIONS[square], squares[square]) for square in self.piece_lists[color]]
+
+    def get_all_moves(self, color: Color) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Все ходы стороны color в виде ((from_row, from_col), (to_row, to_col)).
+        Перебираются только клетки из списка фигур этого цвета.
+        """
+        squares = self._squares
+        moves = []
+        for square in self.piece_lists[color]:
+            from_pos = SQUARE_POSITIONS[square]
+            for target in self._target_squares(square, squares[square]):
+                moves.append((from_pos, SQUARE_POSITIONS[target]))
+        return moves
     
+    def generate_moves(self, color: Color, buffer: Optional[array] = None) -> array:
+        """
+        Все ходы стороны color в компактном виде (см. encode_move).
+        Если передан buffer, он очищается и заполняется заново — так в поиске
+        не создаются новые списки и кортежи на каждом узле.
+        """
+        if buffer is None:
+            buffer = new_move_buffer()
+        else:
+            del buffer[:]
+        append = buffer.append
+        squares = self._squares
+        enemy = self.occupancy[OPPONENT[color]]
+        promotion_mask = PROMOTION_MASKS[color]
+        for square in self.piece_lists[color]:
+            piece = squares[square]
+            is_pawn = piece.type is _PAWN
+            for target in self._target_squares(square, piece):
+                move = square | target << MOVE_TO_SHIFT
+                if enemy >> target & 1:
+                    move |= MOVE_CAPTURE
+                if is_pawn and promotion_mask >> target & 1:
+                    move |= MOVE_PROMOTION
+                append(move)
+        return buffer
+
+    def perft(self, depth: int) -> int:
+        """
+        Считает число позиций на глубине depth полуходов от текущей
+        (ход — у side_to_move). Позиция со взятым королем конечна.
+        Нужна для проверки и замеров скорости генератора ходов.
+        """
+        if depth == 0:
+            return 1
+        if self.is_king_captured():
+            return 0
+        moves = self.generate_moves(self.side_to_move)
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            record = self.make_encoded_move(move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move(record)
+        return nodes
+
+    def divide(self, depth: int) -> Dict[Tuple[Tuple[int, int], Tuple[int, int]], int]:
+        """perft с разбивкой по первому ходу"""
+        result = {}
+        if depth < 1 or self.is_king_captured():
+            return result
+        for move in self.generate_moves(self.side_to_move):
+            record = self.make_encoded_move(move)
+            result[decode_move(move)] = self.perft(depth - 1)
+            self.unmake_move(record)
+        return result
+
     def get_legal_moves(self, row: int, col: int) -> List[Tuple[int, int]]:
-        piece = self.get_piece(row, col)
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            return []
+        square = row * BOARD_SIZE + col
+        piece = self._squares[square]
         if not piece:
             return []
-        
-        moves = []
-        if piece.type == PieceType.PAWN:
-            direction = -1 if piece.color == Color.WHITE else 1
-            # Ход вперед
-            if 0 <= row + direction < self.size:
-                if not self.get_piece(row + direction, col):
-                    moves.append((row + direction, col))
-                    # Двойной ход с начальной позиции
-                    if (piece.color == Color.WHITE and row == 3) or \
-                       (piece.color == Color.BLACK and row == 1):
-                        if not self.get_piece(row + 2 * direction, col):
-                            moves.append((row + 2 * direction, col))
-                # Взятие по диагонали
-                for dcol in [-1, 1]:
-                    if 0 <= col + dcol < self.size:
-                        target = self.get_piece(row + direction, col + dcol)
-                        if target and target.color != piece.color:
-                            moves.append((row + direction, col + dcol))
-        
-        elif piece.type == PieceType.ROOK:
-            directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-            for drow, dcol in directions:
-                current_row, current_col = row + drow, col + dcol
-                while 0 <= current_row < self.size and 0 <= current_col < self.size:
-                    target = self.get_piece(current_row, current_col)
-                    if target:
-                        if target.color != piece.color:
-                            moves.append((current_row, current_col))
-                        break
-                    moves.append((current_row, current_col))
-                    current_row += drow
-                    current_col += dcol
-        
-        elif piece.type == PieceType.BISHOP:
-            directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-            for drow, dcol in directions:
-                current_row, current_col = row + drow, col + dcol
-                while 0 <= current_row < self.size and 0 <= current_col < self.size:
-                    target = self.get_piece(current_row, current_col)
-                    if target:
-                        if target.color != piece.color:
-                            moves.append((current_row, current_col))
+        return [SQUARE_POSITIONS[target] for target in self._target_squares(square, piece)]
+
+    def _target_squares(self, square: int, piece: Piece) -> List[int]:
+        """Клетки, на которые может пойти фигура: поиск по таблицам и проверка блокеров"""
+        occupied = self.occupied
+        own = self.occupancy[piece.color]
+        targets = []
+        piece_type = piece.type
+        if piece_type is _PAWN:
+            # Ход вперед и двойной ход с начальной позиции
+            for target in PAWN_PUSHES[piece.color][square]:
+                if occupied >> target & 1:
+                    break
+                targets.append(target)
+            # Взятие по диагонали
+            enemy = occupied & ~own
+            for target in PAWN_CAPTURES[piece.color][square]:
+                if enemy >> target & 1:
+                    targets.append(target)
+
+        elif piece_type is _KING:
+            for target in KING_TARGETS[square]:
+                if not own >> target & 1:
+                    targets.append(target)
+
+        else:
+            rays = ROOK_RAYS[square] if piece_type is _ROOK else BISHOP_RAYS[square]
+            for ray in rays:
+                for target in ray:
+                    if occupied >> target & 1:
+                        if not own >> target & 1:
+                            targets.append(target)
                         break
-                    moves.append((current_row, current_col))
-                    current_row += drow
-                    current_col += dcol
-        
-        elif piece.type == PieceType.KING:
-            directions = [(0, 1), (1, 0), (0, -1), (-1, 0),
-                         (1, 1), (1, -1), (-1, 1), (-1, -1)]
-            for drow, dcol in directions:
-                new_row, new_col = row + drow, col + dcol
-                if 0 <= new_row < self.size and 0 <= new_col < self.size:
-                    target = self.get_piece(new_row, new_col)
-                    if not target or target.color != piece.color:
-                        moves.append((new_row, new_col))
-        
-        return moves 
\ No newline at end of file
+                    targets.append(target)
+
+        return targets
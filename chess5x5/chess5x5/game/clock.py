@@ -0,0 +1,147 @@
+import ctypes
+import threading
+import time
+from typing import Callable, Dict, Optional
+from .board import Board, Color
+
+# Что делать со стороной, превысившей лимит времени
+OVERRUN_FORFEIT = "forfeit"    # поражение
+OVERRUN_FALLBACK = "fallback"  # до конца партии оценивать только материал
+OVERRUN_SKIP = "skip"          # не учитывать оценку; без бюджета — первый возможный ход
+OVERRUN_POLICIES = (OVERRUN_FORFEIT, OVERRUN_FALLBACK, OVERRUN_SKIP)
+
+class EvaluationTimeout(BaseException):
+    """
+    Прерывание функции оценки, исчерпавшей бюджет времени.
+    Наследуется от BaseException, чтобы его не перехватил
+    `except Exception` внутри загруженной функции.
+    """
+
+class TimeOverrun(Exception):
+    """Сторона превысила лимит времени на вызов или бюджет партии"""
+
+    def __init__(self, color: Color, budget_exhausted: bool):
+        self.color = color
+        self.budget_exhausted = budget_exhausted
+        reason = "исчерпан бюджет партии" if budget_exhausted else "превышен лимит на вызов"
+        super().__init__(f"{color.value}: {reason}")
+
+# Период, с которым сторож проверяет сроки (точность жесткого лимита)
+WATCHDOG_INTERVAL = 0.01
+
+class _Watchdog:
+    """
+    Сторожевой поток: прерывает функцию оценки, не уложившуюся в срок,
+    исключением EvaluationTimeout в ее потоке (PyThreadState_SetAsyncExc).
+    Работает в любом потоке, в том числе в обработчиках веб-запросов.
+    Чистый Python прерывается на ближайшей инструкции, долгий вызов
+    на C (например, time.sleep) — только после возврата из него.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deadlines: Dict[int, float] = {}
+        self._fired = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def arm(self, deadline: float):
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._fired.discard(thread_id)
+            self._deadlines[thread_id] = deadline
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="evaluation-watchdog", daemon=True)
+                self._thread.start()
+
+    def disarm(self) -> bool:
+        """Снимает срок; возвращает True, если сторож уже сработал"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._deadlines.pop(thread_id, None)
+            if thread_id not in self._fired:
+                return False
+            self._fired.discard(thread_id)
+            # Исключение могло еще не дойти до потока — отменяем его
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), None)
+            return True
+
+    def _run(self):
+        while True:
+            time.sleep(WATCHDOG_INTERVAL)
+            now = time.perf_counter()
+            with self._lock:
+                for thread_id, deadline in list(self._deadlines.items()):
+                    if now >= deadline:
+                        del self._deadlines[thread_id]
+                        self._fired.add(thread_id)
+                        ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                            ctypes.c_ulong(thread_id), ctypes.py_object(EvaluationTimeout)
+                        )
+
+_watchdog = _Watchdog()
+
+class GameClock:
+    """
+    Шахматные часы для функций оценки в одной партии.
+    time_budget — секунд на все вызовы оценки каждой стороны за партию;
+    call_time_limit — мягкий лимит на один вызов (проверяется после вызова).
+    Бюджет жесткий: вызов, исчерпавший остаток бюджета, прерывается
+    сторожевым потоком (с точностью до WATCHDOG_INTERVAL).
+    """
+
+    def __init__(self, time_budget: Optional[float] = None,
+                 call_time_limit: Optional[float] = None,
+                 policy: str = OVERRUN_FORFEIT):
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Неизвестная политика перерасхода времени: {policy}")
+        self.time_budget = time_budget
+        self.call_time_limit = call_time_limit
+        self.policy = policy
+        self.remaining: Dict[Color, float] = {
+            color: time_budget if time_budget is not None else float('inf') for color in Color
+        }
+        self.overruns: Dict[Color, int] = {color: 0 for color in Color}
+
+    def is_exhausted(self, color: Color) -> bool:
+        return self.remaining[color] <= 0
+
+    def charge(self, color: Color, seconds: float) -> bool:
+        """
+        Списывает время решения, принятого без вызова оценки (из кэша решений).
+        Если остатка бюджета не хватает, ничего не списывает и возвращает False.
+        """
+        if seconds >= self.remaining[color]:
+            return False
+        self.remaining[color] -= seconds
+        return True
+
+    def call(self, evaluation_function: Callable[[Board, Color], float],
+             board: Board, color: Color) -> float:
+        """
+        Вызывает функцию оценки за счет времени стороны color.
+        При превышении лимита на вызов или бюджета бросает TimeOverrun.
+        """
+        use_watchdog = self.time_budget is not None
+        interrupted = False
+        start = time.perf_counter()
+        try:
+            try:
+                if use_watchdog:
+                    _watchdog.arm(start + self.remaining[color])
+                score = evaluation_function(board, color)
+            finally:
+                if use_watchdog and _watchdog.disarm():
+                    interrupted = True
+        except EvaluationTimeout:
+            interrupted = True
+        elapsed = time.perf_counter() - start
+        self.remaining[color] -= elapsed
+
+        if interrupted or self.is_exhausted(color):
+            self.remaining[color] = min(self.remaining[color], 0.0)
+            self.overruns[color] += 1
+            raise TimeOverrun(color, budget_exhausted=True)
+        if self.call_time_limit is not None and elapsed > self.call_time_limit:
+            self.overruns[color] += 1
+            raise TimeOverrun(color, budget_exhausted=False)
+        return score
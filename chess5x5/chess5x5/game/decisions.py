@@ -0,0 +1,119 @@
+"""
+Постоянный кэш решений: какой ход выбрал оценщик в позиции.
+
+Game выбирает ход перебором на один полуход, поэтому для чистой функции
+оценки ход в позиции всегда один и тот же. Кэш хранит эти решения
+в файле SQLite под ключом (хэш исходного кода оценщика, позиция, цвет)
+и переживает перезапуск: повторный турнир с теми же файлами почти
+не вызывает функции оценки.
+
+Вместе с ходом хранится время оценки, за которое он был выбран: партия
+с часами списывает его при попадании в кэш, поэтому кэш ускоряет партию,
+но не меняет ее исход.
+
+Хэш оценщика задается атрибутом функции source_hash (см. source_hash);
+функции без него через кэш не проходят.
+"""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from .board import Board, Color
+
+# Версия правил выбора хода (порядок генерации ходов, разбор равных оценок);
+# при их изменении версию нужно увеличить, чтобы старые решения не использовались
+DECISION_CACHE_VERSION = 1
+
+
+def source_hash(source: Union[str, bytes]) -> str:
+    """Хэш исходного кода функции оценки для ключа кэша решений"""
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    digest = hashlib.sha256(f"chess5x5-decisions-v{DECISION_CACHE_VERSION}\n".encode("utf-8"))
+    digest.update(source)
+    return digest.hexdigest()
+
+
+def evaluator_hash(evaluation_function: Callable) -> Optional[str]:
+    """Хэш оценщика из атрибута source_hash или None, если его нет"""
+    return getattr(evaluation_function, 'source_hash', None)
+
+
+class DecisionCache:
+    """
+    Кэш решений в файле SQLite (path) или в памяти (path=None).
+    Новые решения записываются в файл при flush() и close().
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path) if self.path is not None else ":memory:")
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(decisions)")]
+        if columns and "seconds" not in columns:
+            # Файл старого формата без времени оценки: его решения нечем списать с часов
+            self._connection.execute("DROP TABLE decisions")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS decisions ("
+            " evaluator TEXT NOT NULL,"
+            " position BLOB NOT NULL,"
+            " color INTEGER NOT NULL,"
+            " move INTEGER NOT NULL,"
+            " seconds REAL NOT NULL,"
+            " PRIMARY KEY (evaluator, position, color))"
+        )
+        self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def __enter__(self) -> 'DecisionCache':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, evaluator: str, board: Board, color: Color) -> Optional[Tuple[int, float]]:
+        """Закодированный ход (см. board.encode_move) и время его выбора в секундах или None"""
+        row = self._connection.execute(
+            "SELECT move, seconds FROM decisions WHERE evaluator = ? AND position = ? AND color = ?",
+            (evaluator, board.to_bytes(), int(color == Color.BLACK))
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], row[1]
+
+    def put(self, evaluator: str, board: Board, color: Color, move: int, seconds: float):
+        """Запоминает ход и время оценки, за которое он выбран"""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO decisions (evaluator, position, color, move, seconds) VALUES (?, ?, ?, ?, ?)",
+            (evaluator, board.to_bytes(), int(color == Color.BLACK), move, seconds)
+        )
+        self.stores += 1
+
+    def flush(self):
+        """Записывает новые решения в файл"""
+        self._connection.commit()
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+    def get_statistics(self) -> Dict[str, float]:
+        """Возвращает счетчики попаданий, промахов и новых решений"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0,
+            "entries": len(self)
+        }
@@ -0,0 +1,83 @@
+"""
+Пакетное кодирование позиций в тензоры NumPy.
+
+Позиция превращается в NUM_PLANES плоскостей 5x5: по плоскости на каждую
+фигуру из CODE_PIECES (белые P, R, B, K, затем черные P, R, B, K) и плоскость
+очереди хода (единицы, если ход черных). Работа идет с 25-байтовыми
+кодами Board.to_bytes, поэтому на одну позицию приходится один вызов
+to_bytes и ни одного цикла по клеткам в Python.
+"""
+
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .board import BOARD_SIZE, CODE_PIECES, NUM_SQUARES, SIDE_TO_MOVE_BIT, Board
+
+NUM_PIECE_PLANES = len(CODE_PIECES) - 1
+SIDE_TO_MOVE_PLANE = NUM_PIECE_PLANES
+NUM_PLANES = NUM_PIECE_PLANES + 1
+
+_PIECE_CODE_RANGE = np.arange(1, NUM_PIECE_PLANES + 1, dtype=np.uint8)[None, :, None]
+
+Position = Union[Board, bytes]
+
+
+def positions_to_codes(positions: Sequence[Position]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Коды фигур позиций: массив (N, 25) uint8 и массив (N,) bool «ход черных».
+    Принимает доски или уже закодированные Board.to_bytes позиции.
+    """
+    data = b"".join(
+        position.to_bytes() if isinstance(position, Board) else position
+        for position in positions
+    )
+    if len(data) != len(positions) * NUM_SQUARES:
+        raise ValueError(f"Каждая позиция должна занимать {NUM_SQUARES} байт")
+    raw = np.frombuffer(data, dtype=np.uint8).reshape(len(positions), NUM_SQUARES)
+    black_to_move = (raw[:, 0] & SIDE_TO_MOVE_BIT) != 0
+    codes = raw.copy()
+    codes[:, 0] &= ~np.uint8(SIDE_TO_MOVE_BIT)
+    return codes, black_to_move
+
+
+def encode_positions(positions: Sequence[Position], dtype=np.uint8) -> np.ndarray:
+    """Тензор (N, NUM_PLANES, 5, 5) для списка досок или их байтовых кодов"""
+    codes, black_to_move = positions_to_codes(positions)
+    return codes_to_planes(codes, black_to_move, dtype)
+
+
+def codes_to_planes(codes: np.ndarray, black_to_move: np.ndarray, dtype=np.uint8) -> np.ndarray:
+    """Коды (N, 25) и признак хода черных -> тензор (N, NUM_PLANES, 5, 5)"""
+    count = codes.shape[0]
+    planes = np.empty((count, NUM_PLANES, NUM_SQUARES), dtype=dtype)
+    np.equal(codes[:, None, :], _PIECE_CODE_RANGE, out=planes[:, :NUM_PIECE_PLANES], casting="unsafe")
+    planes[:, SIDE_TO_MOVE_PLANE] = black_to_move[:, None]
+    return planes.reshape(count, NUM_PLANES, BOARD_SIZE, BOARD_SIZE)
+
+
+def planes_to_codes(planes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Обратное преобразование: коды (N, 25) uint8 и признак хода черных"""
+    planes = np.asarray(planes)
+    if planes.ndim != 4 or planes.shape[1:] != (NUM_PLANES, BOARD_SIZE, BOARD_SIZE):
+        raise ValueError(f"Ожидается тензор (N, {NUM_PLANES}, {BOARD_SIZE}, {BOARD_SIZE})")
+    flat = planes.reshape(planes.shape[0], NUM_PLANES, NUM_SQUARES)
+    pieces = flat[:, :NUM_PIECE_PLANES] != 0
+    if (pieces.sum(axis=1) > 1).any():
+        raise ValueError("На одной клетке несколько фигур")
+    codes = (pieces * _PIECE_CODE_RANGE).sum(axis=1, dtype=np.uint8)
+    black_to_move = flat[:, SIDE_TO_MOVE_PLANE, 0] != 0
+    return codes, black_to_move
+
+
+def decode_positions(planes: np.ndarray) -> List[bytes]:
+    """Тензор плоскостей -> список 25-байтовых кодов Board.to_bytes"""
+    codes, black_to_move = planes_to_codes(planes)
+    codes[:, 0] |= black_to_move.astype(np.uint8) * np.uint8(SIDE_TO_MOVE_BIT)
+    data = codes.tobytes()
+    return [data[offset:offset + NUM_SQUARES] for offset in range(0, len(data), NUM_SQUARES)]
+
+
+def decode_boards(planes: np.ndarray) -> List[Board]:
+    """Тензор плоскостей -> список досок"""
+    return [Board.from_bytes(data) for data in decode_positions(planes)]
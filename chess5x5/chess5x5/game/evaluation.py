@@ -1,5 +1,11 @@
-from typing import Dict
-from .board import Board, Color, Piece, PieceType
+from typing import Dict, Sequence, Union
+import numpy as np
+from .board import Board, Color, Piece, PieceType, CODE_PIECES, NUM_SQUARES
+from .encoding import NUM_PIECE_PLANES, positions_to_codes, codes_to_planes
+from .symmetry import FLIP_CODES, FLIP_SQUARES, MIRROR_SQUARES
+
+# Масштаб фиксированной точки для инкрементальной оценки
+INCREMENTAL_SCALE = 1 << 32
 
 class PositionEvaluator:
     def __init__(self):
@@ -28,8 +34,69 @@ class PositionEvaluator:
             [0.0, 0.2, 0.3, 0.2, 0.0],
             [0.0, 0.0, 0.0, 0.0, 0.0]
         ]
+        
+        self.refresh_tables()
+    
+    def refresh_tables(self):
+        """
+        Пересчитывает таблицы square_values для evaluate_batch
+        и incremental_table для инкрементальной оценки на доске.
+        Вызывайте после изменения piece_values или таблиц бонусов.
+        """
+        size = len(self.center_bonus)
+        # Строка таблицы на каждую фигуру из CODE_PIECES (кроме пустой клетки),
+        # столбец на клетку; значения со знаком с точки зрения белых
+        table = np.zeros((NUM_PIECE_PLANES, NUM_SQUARES))
+        for code, piece in enumerate(CODE_PIECES[1:]):
+            for square in range(NUM_SQUARES):
+                row, col = divmod(square, size)
+                if piece.color == Color.BLACK:
+                    row = size - 1 - row
+                value = self.piece_values[piece.type] + self.center_bonus[row][col]
+                if piece.type == PieceType.PAWN:
+                    value += self.pawn_position_bonus[row][col]
+                table[code, square] = value if piece.color == Color.WHITE else -value
+        self.square_values = table.reshape(-1)
+        # Симметрии оценки (см. symmetry.py) следуют из симметрий таблицы
+        self.mirror_symmetric = bool(np.array_equal(table, table[:, MIRROR_SQUARES]))
+        flipped = -table[np.array(FLIP_CODES[1:]) - 1][:, FLIP_SQUARES]
+        self.color_symmetric = bool(np.array_equal(table, flipped))
+        # Та же таблица в фиксированной точке с нулевой строкой для пустой
+        # клетки (код 0), в формате Board.set_eval_table. Сумма целых точна,
+        # поэтому оценка позиции не зависит от того, какими ходами к ней пришли
+        self.incremental_table = [0] * NUM_SQUARES + [
+            round(value * INCREMENTAL_SCALE) for value in self.square_values.tolist()
+        ]
+    
+    def attach(self, board: Board):
+        """
+        Включает на доске инкрементальную оценку по таблицам этого оценщика.
+        Пока таблица доски — incremental_table, evaluate_position возвращает
+        готовый board.eval_score за O(1) вместо обхода 25 клеток.
+        """
+        board.set_eval_table(self.incremental_table)
+    
+    def evaluate_batch(self, boards: Sequence[Union[Board, bytes]], color: Color) -> np.ndarray:
+        """
+        Оценивает пачку позиций (доски или Board.to_bytes) за один вызов.
+        Позиции кодируются в one-hot плоскости фигур, и оценка каждой —
+        скалярное произведение плоскостей на таблицу square_values.
+        Результат совпадает с evaluate_position для каждой позиции.
+        """
+        codes, black_to_move = positions_to_codes(boards)
+        planes = codes_to_planes(codes, black_to_move, dtype=np.float64)
+        piece_planes = planes[:, :NUM_PIECE_PLANES].reshape(len(boards), -1)
+        scores = piece_planes @ self.square_values
+        return scores if color == Color.WHITE else -scores
+    
+    def __call__(self, board: Board, color: Color) -> float:
+        return self.evaluate_position(board, color)
     
     def evaluate_position(self, board: Board, color: Color) -> float:
+        if board.eval_table is self.incremental_table:
+            score = board.eval_score / INCREMENTAL_SCALE
+            return score if color == Color.WHITE else -score
+        
         score = 0.0
         
         for row in range(board.size):
@@ -59,6 +126,29 @@ class PositionEvaluator:
         
         return score
 
+# Стоимость фигур для material_evaluation
+MATERIAL_VALUES: Dict[PieceType, float] = {
+    PieceType.PAWN: 1.0,
+    PieceType.ROOK: 5.0,
+    PieceType.BISHOP: 3.0,
+    PieceType.KING: 100.0
+}
+
+def material_evaluation(board: Board, color: Color) -> float:
+    """
+    Оценка только по материалу (по счетчикам фигур доски, без обхода клеток).
+    Запасной оценщик для стороны, превысившей лимит времени.
+    """
+    score = 0.0
+    for (piece_type, piece_color), count in board.piece_counts.items():
+        value = MATERIAL_VALUES[piece_type] * count
+        score += value if piece_color == color else -value
+    return score
+
+material_evaluation.mirror_symmetric = True
+material_evaluation.color_symmetric = True
+
 def create_evaluation_function() -> callable:
-    evaluator = PositionEvaluator()
-    return lambda board, color: evaluator.evaluate_position(board, color) 
\ No newline at end of file
+    # Сам оценщик вызываемый; Game замечает у него evaluate_batch
+    # и оценивает все ходы за один вызов
+    return PositionEvaluator() 
\ No newline at end of file
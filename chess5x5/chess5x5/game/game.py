@@ -1,44 +1,85 @@
-from typing import List, Tuple, Optional, Callable
-from .board import Board, Color, PieceType
+import time
+from typing import Dict, List, Tuple, Optional, Callable
+import numpy as np
+from .board import Board, Color, decode_move, encode_move, new_move_buffer, square_index
+from .profiling import EvaluatorProfile, ProfiledEvaluator, memory_tracing
 from .ai import AlphaBetaAI
-from .evaluation import create_evaluation_function
-from copy import deepcopy
+from .evaluation import create_evaluation_function, material_evaluation
+from .clock import GameClock, TimeOverrun, OVERRUN_FORFEIT, OVERRUN_FALLBACK, OVERRUN_SKIP
+from .tablebase import Tablebase, WIN, LOSS
+from .decisions import DecisionCache, evaluator_hash
+
+# Оценки, отличающиеся меньше чем на эту величину, считаются равными
+SCORE_TOLERANCE = 1e-9
+
+# Биты клеток хода (без флагов взятия и превращения) — так ход хранится в кэше решений
+_MOVE_SQUARES = encode_move(0x1F, 0x1F)
+
+# Лимит ходов в партии: без него партия при политиках skip и fallback
+# (ходы без оценки не тратят время часов) может повторяться бесконечно
+DEFAULT_MAX_MOVES = 200
 
 class Game:
-    def __init__(self, white_eval: Callable, black_eval: Callable):
+    def __init__(self, white_eval: Callable, black_eval: Callable,
+                 profile: bool = False, trace_memory: bool = False,
+                 time_budget: Optional[float] = None,
+                 call_time_limit: Optional[float] = None,
+                 overrun_policy: str = OVERRUN_FORFEIT,
+                 tablebase: Optional[Tablebase] = None,
+                 decision_cache: Optional[DecisionCache] = None,
+                 evaluator_hashes: Optional[Dict[Color, str]] = None,
+                 max_moves: Optional[int] = DEFAULT_MAX_MOVES):
+        """
+        profile: записывать вызовы функций оценки в self.profiles
+        (по цвету, см. EvaluatorProfile); trace_memory: замерять и пик памяти
+        (tracemalloc включается на время play и play_game)
+        time_budget: секунд на оценку каждой стороне за партию;
+        call_time_limit: мягкий лимит на один вызов оценки;
+        overrun_policy: что делать при перерасходе (см. clock.py)
+        tablebase: эндшпильные таблицы; позиция из них сразу решает партию
+        decision_cache: постоянный кэш выбранных ходов (см. decisions.py);
+        evaluator_hashes: хэши оценщиков по цвету, по умолчанию берутся
+        из атрибута source_hash функций; сторона без хэша не кэшируется
+        max_moves: после стольких ходов каждой стороны партия заканчивается
+        вничью; None — без лимита
+        """
         self.board = Board()
+        self.tablebase = tablebase
+        self.max_moves = max_moves
+        self.decision_cache = decision_cache
+        if evaluator_hashes is None:
+            evaluator_hashes = {Color.WHITE: evaluator_hash(white_eval), Color.BLACK: evaluator_hash(black_eval)}
+        self.evaluator_hashes = evaluator_hashes
+        self.clock: Optional[GameClock] = None
+        if time_budget is not None or call_time_limit is not None:
+            self.clock = GameClock(time_budget, call_time_limit, overrun_policy)
+        # Сторона, проигравшая по времени, и стороны, перешедшие на оценку материала
+        self.forfeited: Optional[Color] = None
+        self._fallback = set()
+        self.profiles: Dict[Color, EvaluatorProfile] = {}
+        self._trace_memory = profile and trace_memory
+        if profile:
+            self.profiles = {Color.WHITE: EvaluatorProfile(), Color.BLACK: EvaluatorProfile()}
+            white_eval = ProfiledEvaluator(white_eval, self.profiles[Color.WHITE], trace_memory)
+            black_eval = ProfiledEvaluator(black_eval, self.profiles[Color.BLACK], trace_memory)
         self.white_eval = white_eval
         self.black_eval = black_eval
         self.moves = []
         self.move_history = []
         self.current_player = Color.WHITE
+        self._move_buffer = new_move_buffer()
     
     def make_move(self) -> bool:
-        if self.board.is_king_captured():
+        if self.board.is_king_captured() or self._move_limit_reached():
             return False
             
         eval_func = self.white_eval if self.current_player == Color.WHITE else self.black_eval
-        best_move = None
-        best_score = float('-inf')
-        
-        # Перебираем все возможные ходы
-        for row in range(self.board.size):
-            for col in range(self.board.size):
-                piece = self.board.get_piece(row, col)
-                if piece and piece.color == self.current_player:
-                    moves = self.board.get_legal_moves(row, col)
-                    for move_row, move_col in moves:
-                        # Сохраняем текущее состояние
-                        board_copy = deepcopy(self.board)
-                        board_copy.move_piece((row, col), (move_row, move_col))
-                        
-                        # Оцениваем позицию
-                        score = eval_func(board_copy, self.current_player)
-                        if score > best_score:
-                            best_score = score
-                            best_move = ((row, col), (move_row, move_col))
+        try:
+            best_move = self._choose_move(eval_func, self.current_player)
+        except TimeOverrun:
+            return False
         
-        if best_move:
+        if best_move is not None:
             from_pos, to_pos = best_move
             from_piece = self.board.get_piece(*from_pos)
             to_piece = self.board.get_piece(*to_pos)
@@ -48,16 +89,146 @@ class Game:
             self.moves.append(move_str)
             
             # Выполняем ход
-            self.board.move_piece(from_pos, to_pos)
+            self.board.make_move(from_pos, to_pos)
             self.move_history.append(best_move)
             self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
             return True
             
         return False
     
+    def _choose_move(self, eval_func: Callable, color: Color) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Выбирает ход с лучшей оценкой позиции после него с учетом часов
+        и кэша решений. Решение из кэша списывает с часов время оценки,
+        за которое оно было выбрано; если на него не хватает бюджета,
+        ход выбирается оценкой, как без кэша. В кэш попадают только ходы,
+        выбранные полной оценкой без перерасхода.
+        """
+        evaluator = self.evaluator_hashes.get(color) if self.decision_cache is not None else None
+        clock = self.clock
+        if evaluator is None or color in self._fallback or (clock is not None and clock.is_exhausted(color)):
+            return self._timed_move(eval_func, color)
+        
+        cached = self.decision_cache.get(evaluator, self.board, color)
+        if cached is not None:
+            cached_move, seconds = cached
+            # Проверяем, что ход возможен (файл кэша мог устареть)
+            for move in self.board.generate_moves(color, self._move_buffer):
+                if move & _MOVE_SQUARES == cached_move:
+                    if clock is None or clock.charge(color, seconds):
+                        return decode_move(move)
+                    break
+        
+        if clock is None:
+            start = time.perf_counter()
+            best_move = self._timed_move(eval_func, color)
+            seconds = time.perf_counter() - start
+        else:
+            overruns = clock.overruns[color]
+            remaining = clock.remaining[color]
+            best_move = self._timed_move(eval_func, color)
+            seconds = remaining - clock.remaining[color]
+            if clock.overruns[color] != overruns or clock.is_exhausted(color):
+                return best_move
+        if best_move is not None and color not in self._fallback:
+            (from_row, from_col), (to_row, to_col) = best_move
+            self.decision_cache.put(evaluator, self.board, color,
+                                    encode_move(square_index(from_row, from_col), square_index(to_row, to_col)),
+                                    seconds)
+        return best_move
+    
+    def _timed_move(self, eval_func: Callable, color: Color) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Выбирает ход с лучшей оценкой позиции после него с учетом часов.
+        При политике forfeit перерасход времени бросает TimeOverrun
+        и записывает проигравшую сторону в self.forfeited.
+        """
+        clock = self.clock
+        if clock is None:
+            return self._best_move(eval_func, color)
+        if color in self._fallback:
+            return self._best_move(material_evaluation, color)
+        if clock.is_exhausted(color):
+            # Политика skip: время кончилось, ходим без оценки
+            moves = self.board.generate_moves(color, self._move_buffer)
+            return decode_move(moves[0]) if moves else None
+        try:
+            return self._best_move(eval_func, color)
+        except TimeOverrun:
+            if clock.policy == OVERRUN_FALLBACK:
+                self._fallback.add(color)
+                return self._best_move(material_evaluation, color)
+            self.forfeited = color
+            raise
+    
+    def _evaluate(self, eval_func: Callable, color: Color):
+        if self.clock is None or eval_func is material_evaluation:
+            return eval_func(self.board, color)
+        return self.clock.call(eval_func, self.board, color)
+    
+    def _best_move(self, eval_func: Callable, color: Color) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Выбирает ход с лучшей оценкой позиции после него.
+        Если у функции оценки есть evaluate_batch (как у PositionEvaluator),
+        все позиции хода оцениваются за один вызов.
+        """
+        moves = self.board.generate_moves(color, self._move_buffer)
+        # При политике skip оценка, превысившая лимит, не учитывается
+        skip = self.clock is not None and self.clock.policy == OVERRUN_SKIP
+        evaluate_batch = getattr(eval_func, 'evaluate_batch', None)
+        if evaluate_batch is not None:
+            if not moves:
+                return None
+            positions = []
+            for move in moves:
+                record = self.board.make_encoded_move(move)
+                positions.append(self.board.to_bytes())
+                self.board.unmake_move(record)
+            try:
+                scores = self._evaluate(lambda board, side: evaluate_batch(positions, side), color)
+            except TimeOverrun:
+                if not skip:
+                    raise
+                return decode_move(moves[0])
+            # Порядок суммирования в пакете другой, поэтому равные оценки могут
+            # отличаться в последних битах; как и при поштучной оценке,
+            # из равных выбираем первый ход
+            best_index = int(np.argmax(scores >= scores.max() - SCORE_TOLERANCE))
+            return decode_move(moves[best_index])
+        
+        best_move = None
+        best_score = float('-inf')
+        
+        # Перебираем все возможные ходы
+        for move in moves:
+            record = self.board.make_encoded_move(move)
+            
+            # Оцениваем позицию и возвращаем доску в исходное состояние
+            try:
+                score = self._evaluate(eval_func, color)
+            except TimeOverrun as overrun:
+                if not skip:
+                    raise
+                if overrun.budget_exhausted:
+                    # Оценивать больше нечем: лучший из оцененных ходов
+                    break
+                continue
+            finally:
+                self.board.unmake_move(record)
+            
+            if score > best_score:
+                best_score = score
+                best_move = move
+        
+        if best_move is None and skip and moves:
+            best_move = moves[0]
+        
+        return decode_move(best_move) if best_move is not None else None
+    
     def play(self) -> List[str]:
-        while self.make_move():
-            pass
+        with memory_tracing(self._trace_memory):
+            while self.make_move():
+                pass
         return self.moves
     
     def _format_move(self, move: Tuple[Tuple[int, int], Tuple[int, int]], color: Color) -> str:
@@ -84,37 +255,30 @@ class Game:
         Играет полную партию и возвращает победителя (Color.WHITE или Color.BLACK)
         или None в случае ничьей
         """
+        with memory_tracing(self._trace_memory):
+            return self._play_game()
+    
+    def _play_game(self) -> Optional[Color]:
         print("\n=== Начало новой партии ===")
         move_number = 1
         
         while not self.board.is_king_captured():
-            # Ход белых
-            best_move = None
-            best_score = float('-inf')
+            if self._move_limit_reached():
+                print(f"\nНичья (сделано {self.max_moves} ходов)")
+                return None
             
-            # Перебираем все возможные ходы белых
-            for row in range(self.board.size):
-                for col in range(self.board.size):
-                    piece = self.board.get_piece(row, col)
-                    if piece and piece.color == Color.WHITE:
-                        moves = self.board.get_legal_moves(row, col)
-                        for move_row, move_col in moves:
-                            # Сохраняем текущее состояние
-                            original_piece = self.board.get_piece(move_row, move_col)
-                            self.board.move_piece((row, col), (move_row, move_col))
-                            
-                            # Оцениваем позицию
-                            score = self.white_eval(self.board, Color.WHITE)
-                            if score > best_score:
-                                best_score = score
-                                best_move = ((row, col), (move_row, move_col))
-                                
-                            # Возвращаем доску в исходное состояние
-                            self.board.move_piece((move_row, move_col), (row, col))
-                            if original_piece:
-                                self.board.board[move_row][move_col] = original_piece
+            decided, winner = self._adjudicate()
+            if decided:
+                return winner
             
-            if not best_move:
+            # Ход белых
+            try:
+                best_move = self._choose_move(self.white_eval, Color.WHITE)
+            except TimeOverrun:
+                print(f"\nБелые проиграли по времени")
+                return Color.BLACK
+            
+            if best_move is None:
                 print(f"\nЧерные победили (белые не могут сделать ход)")
                 return Color.BLACK
                 
@@ -125,33 +289,18 @@ class Game:
                 print(f"\nБелые победили (мат)")
                 return Color.WHITE
             
-            # Ход черных
-            best_move = None
-            best_score = float('-inf')
+            decided, winner = self._adjudicate()
+            if decided:
+                return winner
             
-            # Перебираем все возможные ходы черных
-            for row in range(self.board.size):
-                for col in range(self.board.size):
-                    piece = self.board.get_piece(row, col)
-                    if piece and piece.color == Color.BLACK:
-                        moves = self.board.get_legal_moves(row, col)
-                        for move_row, move_col in moves:
-                            # Сохраняем текущее состояние
-                            original_piece = self.board.get_piece(move_row, move_col)
-                            self.board.move_piece((row, col), (move_row, move_col))
-                            
-                            # Оцениваем позицию
-                            score = self.black_eval(self.board, Color.BLACK)
-                            if score > best_score:
-                                best_score = score
-                                best_move = ((row, col), (move_row, move_col))
-                                
-                            # Возвращаем доску в исходное состояние
-                            self.board.move_piece((move_row, move_col), (row, col))
-                            if original_piece:
-                                self.board.board[move_row][move_col] = original_piece
+            # Ход черных
+            try:
+                best_move = self._choose_move(self.black_eval, Color.BLACK)
+            except TimeOverrun:
+                print(f"\nЧерные проиграли по времени")
+                return Color.WHITE
             
-            if not best_move:
+            if best_move is None:
                 print(f"\nБелые победили (черные не могут сделать ход)")
                 return Color.WHITE
                 
@@ -161,20 +310,41 @@ class Game:
             move_number += 1
         
         # Определяем победителя
-        for row in range(self.board.size):
-            for col in range(self.board.size):
-                piece = self.board.get_piece(row, col)
-                if piece and piece.type == PieceType.KING:
-                    winner = piece.color
-                    print(f"\n{winner.value} победили (мат)")
-                    return winner
+        for winner in (Color.WHITE, Color.BLACK):
+            if self.board.king_squares[winner] is not None:
+                print(f"\n{winner.value} победили (мат)")
+                return winner
         
         print("\nНичья")
         return None
     
+    def _move_limit_reached(self) -> bool:
+        return self.max_moves is not None and len(self.move_history) >= 2 * self.max_moves
+    
+    def _adjudicate(self) -> Tuple[bool, Optional[Color]]:
+        """
+        Решает партию по эндшпильной таблице.
+        Возвращает (решена ли партия, победитель или None при ничьей).
+        """
+        if self.tablebase is None:
+            return False, None
+        result = self.tablebase.probe(self.board)
+        if result is None:
+            return False, None
+        side = self.board.side_to_move
+        if result.wdl == WIN:
+            winner = side
+        elif result.wdl == LOSS:
+            winner = Color.BLACK if side == Color.WHITE else Color.WHITE
+        else:
+            print("\nНичья по эндшпильной таблице")
+            return True, None
+        print(f"\n{winner.value} победили по эндшпильной таблице")
+        return True, winner
+    
     def _make_move(self, move: Tuple[Tuple[int, int], Tuple[int, int]]):
         from_pos, to_pos = move
-        self.board.move_piece(from_pos, to_pos)
+        self.board.make_move(from_pos, to_pos)
         self.move_history.append(move)
     
     def get_move_history(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
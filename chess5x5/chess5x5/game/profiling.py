@@ -0,0 +1,115 @@
+import time
+import tracemalloc
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from .board import Board, Color
+
+# Процентили времени вызова, которые попадают в сводку
+PERCENTILES = (50, 90, 99)
+
+# tracemalloc.reset_peak появился в Python 3.9
+_reset_peak = getattr(tracemalloc, 'reset_peak', None)
+
+@contextmanager
+def memory_tracing(enabled: bool = True) -> Iterator[None]:
+    """
+    Включает tracemalloc на время блока (если он еще не включен)
+    и выключает после, в том числе при исключении
+    """
+    started = enabled and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
+class EvaluatorProfile:
+    """
+    Профиль функции оценки: число вызовов, время каждого вызова
+    (по часам и по процессору) и пик памяти за вызов (если включен tracemalloc).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_times = array('d')
+        self.cpu_time = 0.0
+        self.peak_memory = 0
+
+    def record(self, wall_time: float, cpu_time: float, peak_memory: int = 0):
+        self.calls += 1
+        self.wall_times.append(wall_time)
+        self.cpu_time += cpu_time
+        if peak_memory > self.peak_memory:
+            self.peak_memory = peak_memory
+
+    def merge(self, other: 'EvaluatorProfile'):
+        """Добавляет к профилю вызовы другого профиля"""
+        self.calls += other.calls
+        self.wall_times.extend(other.wall_times)
+        self.cpu_time += other.cpu_time
+        self.peak_memory = max(self.peak_memory, other.peak_memory)
+
+    def percentile(self, percent: float) -> float:
+        """Время вызова, которое не превышают percent процентов вызовов"""
+        if not self.wall_times:
+            return 0.0
+        ordered = sorted(self.wall_times)
+        index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, float]:
+        """Сводка профиля; времена в секундах, память в байтах"""
+        total = sum(self.wall_times)
+        result = {
+            "eval_calls": self.calls,
+            "eval_time_total": total,
+            "eval_time_mean": total / self.calls if self.calls > 0 else 0.0,
+        }
+        for percent in PERCENTILES:
+            result[f"eval_time_p{percent}"] = self.percentile(percent)
+        result["eval_time_max"] = max(self.wall_times) if self.wall_times else 0.0
+        result["eval_cpu_time"] = self.cpu_time
+        result["eval_peak_memory"] = self.peak_memory
+        return result
+
+class ProfiledEvaluator:
+    """
+    Обертка функции оценки, записывающая каждый вызов в EvaluatorProfile.
+    При trace_memory замеряет пик памяти вызова, если tracemalloc включен
+    (см. memory_tracing; включает его владелец — Game или Tournament).
+    Трассировка заметно замедляет любой код, поэтому по умолчанию выключена.
+    На Python 3.8 пик не сбрасывается, и вместо него записывается прирост
+    памяти за вызов.
+    """
+
+    def __init__(self, evaluation_function: Callable[[Board, Color], float],
+                 profile: Optional[EvaluatorProfile] = None, trace_memory: bool = False):
+        self.evaluation_function = evaluation_function
+        self.profile = profile if profile is not None else EvaluatorProfile()
+        self.trace_memory = trace_memory
+        # Симметрии оценщика (см. symmetry.py) сохраняются
+        for name in ('mirror_symmetric', 'color_symmetric'):
+            if hasattr(evaluation_function, name):
+                setattr(self, name, getattr(evaluation_function, name))
+
+    def __call__(self, board: Board, color: Color) -> float:
+        peak = 0
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            if _reset_peak is not None:
+                _reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            return self.evaluation_function(board, color)
+        finally:
+            cpu_time = time.process_time() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+            if tracing:
+                current, traced_peak = tracemalloc.get_traced_memory()
+                peak = max(0, (traced_peak if _reset_peak is not None else current) - memory_before)
+            self.profile.record(wall_time, cpu_time, peak)
@@ -0,0 +1,129 @@
+"""
+Симметрии доски 5x5 для кэшей и таблиц.
+
+Начальная позиция симметрична слева направо, а при замене цвета
+с отражением по вертикали переходит сама в себя. Для оценщиков
+с такими же симметриями позиция и ее отражения получают одну оценку,
+поэтому их можно хранить в кэше под одним каноническим ключом.
+
+Оценщик объявляет симметрии атрибутами:
+    mirror_symmetric — оценка не меняется при отражении слева направо;
+    color_symmetric — оценка позиции за цвет color равна оценке позиции
+    с переставленными цветами (и отраженной по вертикали) за соперника.
+"""
+
+from typing import Callable, Iterable, Tuple
+
+from .board import (
+    BOARD_SIZE, CODE_PIECES, NUM_SQUARES, OPPONENT, PIECE_CODES, SIDE_TO_MOVE_BIT,
+    SQUARE_POSITIONS, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_CODE_KEYS, Board, Color, Piece,
+    square_index,
+)
+
+# Клетка после отражения слева направо и после отражения по вертикали
+MIRROR_SQUARES: Tuple[int, ...] = tuple(
+    square_index(row, BOARD_SIZE - 1 - col) for row, col in SQUARE_POSITIONS
+)
+FLIP_SQUARES: Tuple[int, ...] = tuple(
+    square_index(BOARD_SIZE - 1 - row, col) for row, col in SQUARE_POSITIONS
+)
+# Код фигуры того же типа другого цвета
+FLIP_CODES: Tuple[int, ...] = (0,) + tuple(
+    PIECE_CODES[Piece(piece.type, OPPONENT[piece.color])] for piece in CODE_PIECES[1:]
+)
+
+
+def _transformed_keys(square_map: Tuple[int, ...], code_map: Tuple[int, ...]):
+    # Ключ Зобриста фигуры с кодом code на клетке square после преобразования
+    return tuple(
+        [ZOBRIST_CODE_KEYS[code_map[code]][square_map[square]] for square in range(NUM_SQUARES)]
+        if code else None
+        for code in range(len(CODE_PIECES))
+    )
+
+
+_IDENTITY_CODES = tuple(range(len(CODE_PIECES)))
+_MIRROR_KEYS = _transformed_keys(MIRROR_SQUARES, _IDENTITY_CODES)
+_FLIP_KEYS = _transformed_keys(FLIP_SQUARES, FLIP_CODES)
+_FLIP_MIRROR_KEYS = _transformed_keys(
+    tuple(MIRROR_SQUARES[square] for square in FLIP_SQUARES), FLIP_CODES
+)
+
+
+def _piece_codes(board: Board) -> bytes:
+    data = bytearray(board.to_bytes())
+    data[0] &= ~SIDE_TO_MOVE_BIT
+    return bytes(data)
+
+
+def canonical_key(board: Board, color: Color, mirror: bool = True,
+                  color_flip: bool = False) -> Tuple[int, Color]:
+    """
+    Канонический ключ позиции для оценки за цвет color.
+    Из ключа Зобриста самой позиции и ключей ее отражений (слева направо,
+    а при color_flip и с заменой цвета) выбирается наименьший.
+    Возвращает (ключ, цвет): при замене цвета оценивать нужно за соперника.
+    """
+    if not mirror and not color_flip:
+        return board.zobrist_key, color
+    mirror_key = flip_key = flip_mirror_key = 0
+    for square, code in enumerate(_piece_codes(board)):
+        if code:
+            mirror_key ^= _MIRROR_KEYS[code][square]
+            flip_key ^= _FLIP_KEYS[code][square]
+            flip_mirror_key ^= _FLIP_MIRROR_KEYS[code][square]
+    if board.side_to_move == Color.BLACK:
+        mirror_key ^= ZOBRIST_BLACK_TO_MOVE
+    else:
+        # После замены цвета ходит другая сторона
+        flip_key ^= ZOBRIST_BLACK_TO_MOVE
+        flip_mirror_key ^= ZOBRIST_BLACK_TO_MOVE
+
+    key = board.zobrist_key
+    if mirror:
+        key = min(key, mirror_key)
+    if color_flip:
+        flipped = min(flip_key, flip_mirror_key) if mirror else flip_key
+        if flipped < key:
+            return flipped, OPPONENT[color]
+    return key, color
+
+
+def transform_board(board: Board, mirror: bool = False, color_flip: bool = False) -> Board:
+    """
+    Возвращает новую доску с позицией, отраженной слева направо (mirror)
+    и/или с переставленными цветами и отраженной по вертикали (color_flip)
+    """
+    codes = _piece_codes(board)
+    transformed = bytearray(NUM_SQUARES)
+    for square, code in enumerate(codes):
+        if mirror:
+            square = MIRROR_SQUARES[square]
+        if color_flip:
+            square = FLIP_SQUARES[square]
+            code = FLIP_CODES[code]
+        transformed[square] = code
+    black_to_move = (board.side_to_move == Color.BLACK) != color_flip
+    if black_to_move:
+        transformed[0] |= SIDE_TO_MOVE_BIT
+    return Board.from_bytes(bytes(transformed))
+
+
+def check_symmetry(evaluation_function: Callable[[Board, Color], float],
+                   boards: Iterable[Board], tolerance: float = 1e-9) -> Tuple[bool, bool]:
+    """
+    Проверяет функцию оценки на наборе позиций.
+    Возвращает (симметрична ли слева направо, симметрична ли при замене цвета).
+    Проверка выборочная: она может найти нарушение, но не доказать симметрию.
+    """
+    mirror_ok = color_ok = True
+    for board in boards:
+        for color in (Color.WHITE, Color.BLACK):
+            score = evaluation_function(board, color)
+            if mirror_ok:
+                mirrored = evaluation_function(transform_board(board, mirror=True), color)
+                mirror_ok = abs(mirrored - score) <= tolerance
+            if color_ok:
+                flipped = evaluation_function(transform_board(board, color_flip=True), OPPONENT[color])
+                color_ok = abs(flipped - score) <= tolerance
+    return mirror_ok, color_ok
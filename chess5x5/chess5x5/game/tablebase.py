@@ -0,0 +1,381 @@
+"""
+Эндшпильные таблицы для малого материала.
+
+Таблица строится ретроградным анализом по правилам доски: партия
+кончается взятием короля, сторона без ходов проигрывает, позиции,
+из которых никто не может форсировать выигрыш, — ничьи.
+Таблица на набор фигур (например, "KRvK": белые король и ладья против
+короля) хранится в файле .npy и открывается через отображение в память.
+Таблицы с переставленными цветами ("KvKR") не хранятся: такие позиции
+отражаются (см. symmetry.py) и ищутся в таблице "KRvK".
+"""
+
+import itertools
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from .board import (
+    BOARD_SIZE, CODE_KEYS, CODE_PIECES, MOVE_CAPTURE, MOVE_PROMOTION, NUM_SQUARES,
+    PIECE_CODES, PROMOTION_ROW, Board, Color, Piece, PieceType,
+    iter_squares, move_from_square, move_to_square,
+)
+from .symmetry import FLIP_CODES, FLIP_SQUARES
+
+WIN, DRAW, LOSS = 1, 0, -1
+
+# Оценка выигрыша по таблице: больше любой оценки материала
+TABLEBASE_WIN_SCORE = 10000.0
+
+# Порядок фигур в имени набора
+PIECE_ORDER = (PieceType.KING, PieceType.ROOK, PieceType.BISHOP, PieceType.PAWN)
+# Буква и ключ piece_counts для каждой стороны в порядке имени
+_SIDE_LETTERS = tuple(
+    tuple((piece_type.value, (piece_type, color)) for piece_type in PIECE_ORDER)
+    for color in (Color.WHITE, Color.BLACK)
+)
+
+
+class TablebaseResult(NamedTuple):
+    """Результат для стороны, чей ход: WIN, DRAW или LOSS и число полуходов до конца партии"""
+    wdl: int
+    distance: int
+
+
+def _decode_value(value: int) -> TablebaseResult:
+    # В таблице хранится wdl * (distance + 1)
+    if value > 0:
+        return TablebaseResult(WIN, value - 1)
+    if value < 0:
+        return TablebaseResult(LOSS, -value - 1)
+    return TablebaseResult(DRAW, 0)
+
+
+def material_name(board: Board) -> str:
+    """Имя набора фигур позиции, например "KRvKP" """
+    counts = board.piece_counts
+    return "v".join(
+        "".join(letter * counts[key] for letter, key in side) for side in _SIDE_LETTERS
+    )
+
+
+def _flip_name(name: str) -> str:
+    white, black = name.split("v")
+    return f"{black}v{white}"
+
+
+def _strength(side: str) -> Tuple[int, Tuple[int, ...]]:
+    return len(side), tuple(-PIECE_ORDER.index(PieceType(letter)) for letter in side)
+
+
+def canonical_material(name: str) -> Tuple[str, bool]:
+    """
+    Имя хранимой таблицы для набора и признак замены цвета:
+    хранится вариант, где у белых больше (или более сильный) материал
+    """
+    flipped = _flip_name(name)
+    white, black = name.split("v")
+    if _strength(black) > _strength(white):
+        return flipped, True
+    return name, False
+
+
+def _name_codes(name: str) -> Tuple[int, ...]:
+    """Коды фигур набора в порядке имени: сначала белые, потом черные"""
+    white, black = name.split("v")
+    if white[:1] != "K" or black[:1] != "K":
+        raise ValueError(f"У каждой стороны должен быть король: {name!r}")
+    codes = []
+    for color, side in ((Color.WHITE, white), (Color.BLACK, black)):
+        for letter in side:
+            codes.append(PIECE_CODES[Piece(PieceType(letter), color)])
+    return tuple(codes)
+
+
+def _groups(codes: Tuple[int, ...]) -> List[Tuple[int, int]]:
+    # Одинаковые фигуры стоят в имени подряд: (код, количество)
+    return [(code, len(list(group))) for code, group in itertools.groupby(codes)]
+
+
+@lru_cache(maxsize=None)
+def _index_keys(name: str, flipped: bool) -> Tuple[Tuple[PieceType, Color], ...]:
+    # Ключи bitboards групп фигур набора (при flipped — фигур другого цвета)
+    return tuple(
+        CODE_KEYS[FLIP_CODES[code] if flipped else code] for code, _ in _groups(_name_codes(name))
+    )
+
+
+def _position_index(board: Board, name: str, flipped: bool = False) -> int:
+    """
+    Номер позиции в таблице набора name: клетки фигур в порядке набора
+    (одинаковые фигуры — по возрастанию клеток) как число по основанию 25,
+    умноженное на 2, плюс 1, если ходят черные. При flipped позиция
+    сначала отражается с заменой цвета.
+    """
+    index = 0
+    bitboards = board.bitboards
+    for key in _index_keys(name, flipped):
+        if flipped:
+            squares = sorted(FLIP_SQUARES[square] for square in iter_squares(bitboards[key]))
+        else:
+            squares = iter_squares(bitboards[key])
+        for square in squares:
+            index = index * NUM_SQUARES + square
+    black_to_move = (board.side_to_move == Color.BLACK) != flipped
+    return index * 2 + int(black_to_move)
+
+
+class Tablebase:
+    """
+    Набор таблиц в каталоге directory.
+    probe(board) возвращает TablebaseResult для стороны, чей ход,
+    или None, если таблицы для такого набора фигур нет.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._tables: Dict[str, Optional[np.ndarray]] = {}
+        names = [path.stem for path in self.directory.glob("*.npy")]
+        # Больше фигур, чем в самой большой таблице, — можно не искать
+        self.max_pieces = max((len(name) - 1 for name in names), default=0)
+
+    def _table(self, name: str) -> Optional[np.ndarray]:
+        if name not in self._tables:
+            path = self.directory / f"{name}.npy"
+            self._tables[name] = np.load(path, mmap_mode="r") if path.exists() else None
+        return self._tables[name]
+
+    def add_table(self, name: str, values: np.ndarray):
+        """Подключает таблицу, построенную в памяти"""
+        self._tables[name] = values
+        self.max_pieces = max(self.max_pieces, len(name) - 1)
+
+    def probe_value(self, board: Board) -> Optional[int]:
+        """Сырое значение из таблицы (wdl * (distance + 1)) или None"""
+        if len(board.piece_lists[Color.WHITE]) + len(board.piece_lists[Color.BLACK]) > self.max_pieces:
+            return None
+        if board.is_king_captured():
+            return None
+        name, flipped = canonical_material(material_name(board))
+        table = self._table(name)
+        if table is None:
+            return None
+        return int(table[_position_index(board, name, flipped)])
+
+    def probe(self, board: Board) -> Optional[TablebaseResult]:
+        value = self.probe_value(board)
+        return _decode_value(value) if value is not None else None
+
+    def score(self, board: Board, color: Color) -> Optional[float]:
+        """
+        Оценка позиции за цвет color по таблице (None, если таблицы нет):
+        выигрыш — TABLEBASE_WIN_SCORE минус число полуходов до конца,
+        проигрыш — со знаком минус, ничья — 0
+        """
+        result = self.probe(board)
+        if result is None:
+            return None
+        score = (TABLEBASE_WIN_SCORE - result.distance) * result.wdl
+        return score if board.side_to_move == color else -score
+
+
+def _placements(codes: Tuple[int, ...]):
+    """Все расстановки набора: кортежи клеток в порядке фигур"""
+    groups = _groups(codes)
+    pawn_rows = {
+        code: PROMOTION_ROW[CODE_PIECES[code].color]
+        for code in set(codes) if CODE_PIECES[code].type == PieceType.PAWN
+    }
+    choices = []
+    for code, count in groups:
+        squares = range(NUM_SQUARES)
+        if code in pawn_rows:
+            # Пешка на горизонтали превращения уже стала бы ладьей
+            squares = [square for square in squares if square // BOARD_SIZE != pawn_rows[code]]
+        choices.append(list(itertools.combinations(squares, count)))
+    for combination in itertools.product(*choices):
+        squares = tuple(square for group in combination for square in group)
+        if len(set(squares)) == len(squares):
+            yield squares
+
+
+def generate_table(name: str, tablebase: Tablebase) -> np.ndarray:
+    """
+    Строит таблицу набора name (в каноническом виде). Таблицы наборов,
+    в которые позиция переходит после взятия или превращения, должны
+    быть доступны в tablebase (см. generate_tablebases).
+    """
+    codes = _name_codes(name)
+    size = 2 * NUM_SQUARES ** len(codes)
+    values = np.zeros(size, dtype=np.int16)
+    resolved = np.zeros(size, dtype=bool)
+    degree = np.zeros(size, dtype=np.int32)
+    parents: List[int] = []
+    children: List[int] = []   # номер позиции в этой таблице или -1
+    external: List[int] = []   # значение позиции-потомка из другой таблицы
+
+    # Для каждой фигуры набора — границы ее группы одинаковых фигур
+    group_bounds = []
+    start = 0
+    for _, count in _groups(codes):
+        group_bounds.extend([(start, start + count)] * count)
+        start += count
+
+    for squares in _placements(codes):
+        data = bytearray(NUM_SQUARES)
+        placement_index = 0
+        for code, square in zip(codes, squares):
+            data[square] = code
+            placement_index = placement_index * NUM_SQUARES + square
+        board = Board.from_bytes(bytes(data))
+        for color in (Color.WHITE, Color.BLACK):
+            board.set_side_to_move(color)
+            index = placement_index * 2 + int(color == Color.BLACK)
+            moves = board.generate_moves(color)
+            degree[index] = len(moves)
+            if not moves:
+                # Сторона без ходов проигрывает
+                values[index] = -1
+                resolved[index] = True
+            enemy_king = board.king_squares[Color.BLACK if color == Color.WHITE else Color.WHITE]
+            for move in moves:
+                parents.append(index)
+                target = move_to_square(move)
+                if target == enemy_king:
+                    # Взятие короля: соперник проиграл за 0 полуходов
+                    children.append(-1)
+                    external.append(-1)
+                elif not move & (MOVE_CAPTURE | MOVE_PROMOTION):
+                    # Тихий ход не меняет набор: номер потомка считается
+                    # по расстановке без хода на доске
+                    moved = list(squares)
+                    piece = squares.index(move_from_square(move))
+                    moved[piece] = target
+                    start, end = group_bounds[piece]
+                    moved[start:end] = sorted(moved[start:end])
+                    child_index = 0
+                    for square in moved:
+                        child_index = child_index * NUM_SQUARES + square
+                    children.append(child_index * 2 + int(color == Color.WHITE))
+                    external.append(0)
+                else:
+                    # Взятие или превращение: значение из таблицы другого набора
+                    record = board.make_encoded_move(move)
+                    value = tablebase.probe_value(board)
+                    if value is None:
+                        raise ValueError(f"Нет таблицы {canonical_material(material_name(board))[0]} для {name}")
+                    board.unmake_move(record)
+                    children.append(-1)
+                    external.append(value)
+
+    parent = np.array(parents, dtype=np.int64)
+    child = np.array(children, dtype=np.int64)
+    internal = child >= 0
+    child_index = np.where(internal, child, 0)
+    external_value = np.array(external, dtype=np.int16)
+    valid = degree > 0
+    longest_external = int(np.abs(external_value).max()) if len(external_value) else 0
+
+    # Ретроградный анализ по числу полуходов: на шаге distance выигрывают
+    # позиции с ходом в проигранную за distance - 1 полуход, проигрывают
+    # позиции, все ходы из которых ведут в выигранные для соперника
+    distance = 0
+    while True:
+        child_value = np.where(internal, values[child_index], external_value)
+        changed = False
+        if distance > 0:
+            winning = np.unique(parent[child_value == -distance])
+            winning = winning[~resolved[winning]]
+            if len(winning):
+                values[winning] = distance + 1
+                resolved[winning] = True
+                changed = True
+                child_value = np.where(internal, values[child_index], external_value)
+        won_children = child_value > 0
+        won_count = np.bincount(parent[won_children], minlength=size)
+        losing = np.flatnonzero(valid & ~resolved & (won_count == degree))
+        if len(losing):
+            longest = np.zeros(size, dtype=np.int16)
+            np.maximum.at(longest, parent[won_children], child_value[won_children])
+            values[losing] = -(longest[losing] + 1)
+            resolved[losing] = True
+            changed = True
+        distance += 1
+        if not changed and distance > longest_external and distance > int(np.abs(values).max()):
+            break
+    return values
+
+
+def _side_materials(max_pieces: int) -> List[str]:
+    # Наборы фигур одной стороны без короля
+    extra = [piece_type.value for piece_type in PIECE_ORDER[1:]]
+    sides = []
+    for count in range(max_pieces - 1):
+        for combination in itertools.combinations_with_replacement(extra, count):
+            sides.append("K" + "".join(combination))
+    return sides
+
+
+def all_materials(max_pieces: int) -> List[str]:
+    """Канонические наборы фигур не более чем из max_pieces фигур (с королями)"""
+    names = set()
+    for white in _side_materials(max_pieces):
+        for black in _side_materials(max_pieces):
+            if len(white) + len(black) <= max_pieces:
+                names.add(canonical_material(f"{white}v{black}")[0])
+    return sorted(names, key=lambda name: (len(name), name))
+
+
+def _sorted_side(letters: str) -> str:
+    return "".join(sorted(letters, key=lambda letter: PIECE_ORDER.index(PieceType(letter))))
+
+
+def _dependencies(name: str) -> List[str]:
+    """
+    Наборы, в которые позиция переходит за один ход: взятие фигуры
+    соперника, превращение пешки или превращение со взятием
+    """
+    white, black = name.split("v")
+    result = set()
+    for mover, other, join in ((white, black, lambda m, o: f"{m}v{o}"),
+                               (black, white, lambda m, o: f"{o}v{m}")):
+        movers = {mover}
+        if "P" in mover:
+            movers.add(_sorted_side(mover.replace("P", "R", 1)))
+        others = {other} | {
+            other[:position] + other[position + 1:]
+            for position, letter in enumerate(other) if letter != "K"
+        }
+        for new_mover in movers:
+            for new_other in others:
+                if (new_mover, new_other) != (mover, other):
+                    result.add(join(new_mover, new_other))
+    return sorted({canonical_material(dependency)[0] for dependency in result})
+
+
+def generate_tablebases(names: List[str], directory: Union[str, Path],
+                        verbose: bool = False) -> Tablebase:
+    """
+    Строит таблицы наборов names и всех наборов, от которых они зависят,
+    и сохраняет их в directory (готовые файлы не пересчитываются)
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tablebase = Tablebase(directory)
+
+    def build(name: str):
+        if tablebase._table(name) is not None:
+            return
+        for dependency in _dependencies(name):
+            build(dependency)
+        if verbose:
+            print(f"Строится таблица {name}...")
+        values = generate_table(name, tablebase)
+        np.save(directory / f"{name}.npy", values)
+        tablebase.add_table(name, np.load(directory / f"{name}.npy", mmap_mode="r"))
+
+    for name in names:
+        build(canonical_material(name)[0])
+    return tablebase
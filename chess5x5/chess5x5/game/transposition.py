@@ -0,0 +1,118 @@
+"""
+Таблица транспозиций для AlphaBetaAI.
+
+На доске 5x5 с ладьями и слонами одна и та же позиция часто получается
+разными порядками ходов. Таблица запоминает результат перебора позиции
+(глубину, тип границы, оценку и лучший ход) по ключу Зобриста, чтобы
+не перебирать ее заново и начинать перебор с лучшего хода.
+
+Размер таблицы фиксирован и задается в мегабайтах. Запись хранится
+в ячейке key % capacity; при столкновении остается запись с большей
+глубиной, а записи прошлых поисков (см. new_search) вытесняются всегда.
+"""
+
+from array import array
+from typing import Dict, NamedTuple, Optional
+
+# Тип оценки в записи: точная, нижняя граница (отсечение по beta),
+# верхняя граница (ни один ход не превысил alpha)
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Байт на запись: ключ, оценка, ход, глубина, тип границы, поколение
+ENTRY_BYTES = 8 + 8 + 2 + 1 + 1 + 1
+
+DEFAULT_TT_MEMORY_MB = 16.0
+
+# Ход 0 (с клетки a5 на нее же) невозможен и означает «хода нет»
+NO_MOVE = 0
+
+
+class TTEntry(NamedTuple):
+    depth: int
+    bound: int
+    score: float
+    move: Optional[int]
+
+
+class TranspositionTable:
+    """Таблица транспозиций фиксированного размера в параллельных массивах"""
+
+    def __init__(self, max_memory_mb: float = DEFAULT_TT_MEMORY_MB,
+                 max_entries: Optional[int] = None):
+        capacity = int(max_memory_mb * 1024 * 1024) // ENTRY_BYTES
+        if max_entries is not None:
+            capacity = min(capacity, max_entries)
+        if capacity <= 0:
+            raise ValueError("Размер таблицы транспозиций должен быть положительным")
+        self.capacity = capacity
+        self._keys = array('Q', bytes(8 * capacity))
+        self._scores = array('d', bytes(8 * capacity))
+        self._moves = array('H', bytes(2 * capacity))
+        self._depths = array('b', [-1]) * capacity  # -1 — пустая ячейка
+        self._bounds = array('B', bytes(capacity))
+        self._generations = array('B', bytes(capacity))
+        self.generation = 0
+        self.entries = 0
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def new_search(self):
+        """Начинает новый поиск: записи прошлых поисков можно вытеснять"""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        """Запись позиции с ключом key или None"""
+        self.probes += 1
+        index = key % self.capacity
+        depth = self._depths[index]
+        if depth < 0:
+            return None
+        if self._keys[index] != key:
+            self.collisions += 1
+            return None
+        self.hits += 1
+        move = self._moves[index]
+        return TTEntry(depth, self._bounds[index], self._scores[index], move if move != NO_MOVE else None)
+
+    def store(self, key: int, depth: int, bound: int, score: float, move: Optional[int]):
+        """Записывает результат перебора, если он не хуже записи в ячейке"""
+        index = key % self.capacity
+        old_depth = self._depths[index]
+        if old_depth < 0:
+            self.entries += 1
+        elif self._generations[index] == self.generation and depth < old_depth:
+            return
+        elif self._keys[index] != key:
+            self.overwrites += 1
+        self.stores += 1
+        self._keys[index] = key
+        self._scores[index] = score
+        self._moves[index] = move if move is not None else NO_MOVE
+        self._depths[index] = depth
+        self._bounds[index] = bound
+        self._generations[index] = self.generation
+
+    def clear(self):
+        """Очищает таблицу (счетчики сохраняются)"""
+        self._depths = array('b', [-1]) * self.capacity
+        self.entries = 0
+
+    def get_statistics(self) -> Dict[str, float]:
+        """Возвращает счетчики обращений, попаданий и столкновений"""
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "collisions": self.collisions,
+            "hit_rate": self.hits / self.probes if self.probes > 0 else 0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "entries": self.entries,
+            "capacity": self.capacity,
+            "memory_bytes": self.capacity * ENTRY_BYTES
+        }
@@ -0,0 +1,23 @@
+import argparse
+import time
+
+from .game.tablebase import all_materials, generate_tablebases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Построение эндшпильных таблиц для доски 5x5")
+    parser.add_argument("--directory", default="tablebases", help="каталог для файлов таблиц")
+    parser.add_argument("--max-pieces", type=int, default=3,
+                        help="все наборы не более чем из стольких фигур (с королями)")
+    parser.add_argument("--material", action="append",
+                        help='набор фигур, например "KRvKP" (вместо --max-pieces)')
+    args = parser.parse_args()
+
+    names = args.material or all_materials(args.max_pieces)
+    start = time.perf_counter()
+    generate_tablebases(names, args.directory, verbose=True)
+    print(f"Готово за {time.perf_counter() - start:.1f} с: {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
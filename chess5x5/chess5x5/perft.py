@@ -0,0 +1,157 @@
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+from .game.board import Board, Color, PieceType, START_FEN
+
+# Тестовые позиции в текстовой записи Board.to_fen
+PERFT_POSITIONS: Dict[str, str] = {
+    "start": START_FEN,
+    "promotion": "2k1r/P3P/5/4p/R1K2 w",
+    "bishops": "b1k2/5/2B2/5/2K1b b",
+    "king_capture": "2k2/2R2/5/1p3/2K2 w",
+    "midgame": "r1kbr/pp1p1/2p1p/1P1B1/P1KPR b",
+}
+
+
+def run_perft(board: Board, depth: int) -> Tuple[int, float]:
+    """Возвращает число узлов и затраченное время в секундах"""
+    start = time.perf_counter()
+    nodes = board.perft(depth)
+    return nodes, time.perf_counter() - start
+
+
+# Направления ходов фигур для эталонного генератора
+ROOK_DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+KING_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+
+def scan_moves(board: Board, color: Color) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    Ходы стороны color обходом доски по клеткам и лучам (как исходный
+    get_legal_moves). Не использует таблицы ходов Board, поэтому годится
+    как независимый эталон для генератора.
+    """
+    size = board.size
+
+    def inside(row: int, col: int) -> bool:
+        return 0 <= row < size and 0 <= col < size
+
+    moves = []
+    for row in range(size):
+        for col in range(size):
+            piece = board.get_piece(row, col)
+            if piece is None or piece.color != color:
+                continue
+            targets = []
+            if piece.type == PieceType.PAWN:
+                direction = -1 if color == Color.WHITE else 1
+                start_row = 3 if color == Color.WHITE else 1
+                if inside(row + direction, col):
+                    if board.get_piece(row + direction, col) is None:
+                        targets.append((row + direction, col))
+                        if row == start_row and board.get_piece(row + 2 * direction, col) is None:
+                            targets.append((row + 2 * direction, col))
+                    for dcol in (-1, 1):
+                        if inside(row + direction, col + dcol):
+                            target = board.get_piece(row + direction, col + dcol)
+                            if target is not None and target.color != color:
+                                targets.append((row + direction, col + dcol))
+            elif piece.type == PieceType.KING:
+                for drow, dcol in KING_DIRECTIONS:
+                    if inside(row + drow, col + dcol):
+                        target = board.get_piece(row + drow, col + dcol)
+                        if target is None or target.color != color:
+                            targets.append((row + drow, col + dcol))
+            else:
+                directions = ROOK_DIRECTIONS if piece.type == PieceType.ROOK else BISHOP_DIRECTIONS
+                for drow, dcol in directions:
+                    current_row, current_col = row + drow, col + dcol
+                    while inside(current_row, current_col):
+                        target = board.get_piece(current_row, current_col)
+                        if target is not None:
+                            if target.color != color:
+                                targets.append((current_row, current_col))
+                            break
+                        targets.append((current_row, current_col))
+                        current_row += drow
+                        current_col += dcol
+            moves.extend(((row, col), target) for target in targets)
+    return moves
+
+
+def perft_by_ray_scan(board: Board, depth: int) -> int:
+    """
+    Perft через scan_moves — эталон для сверки с генератором generate_moves
+    (ошибка в таблицах ходов дает расхождение) и для сравнения скорости
+    """
+    if depth == 0:
+        return 1
+    if board.is_king_captured():
+        return 0
+    nodes = 0
+    for from_pos, to_pos in scan_moves(board, board.side_to_move):
+        record = board.make_move(from_pos, to_pos)
+        nodes += perft_by_ray_scan(board, depth - 1)
+        board.unmake_move(record)
+    return nodes
+
+
+def positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"ожидается целое число не меньше 1: {text}")
+    return value
+
+
+def format_square(position: Tuple[int, int]) -> str:
+    row, col = position
+    return f"{'abcde'[col]}{5 - row}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft: проверка и замер скорости генератора ходов")
+    parser.add_argument("--depth", type=positive_int, default=4, help="глубина в полуходах")
+    parser.add_argument("--position", choices=sorted(PERFT_POSITIONS), action="append",
+                        help="позиция из набора (по умолчанию все)")
+    parser.add_argument("--fen", help="произвольная позиция в записи Board.to_fen")
+    parser.add_argument("--divide", action="store_true", help="разбивка по первому ходу")
+    parser.add_argument("--compare", action="store_true",
+                        help="сверить с независимым перебором по лучам и сравнить скорость")
+    args = parser.parse_args()
+
+    positions = dict(PERFT_POSITIONS)
+    names = args.position or list(PERFT_POSITIONS)
+    if args.fen:
+        positions["fen"] = args.fen
+        names = ["fen"]
+    total_nodes = 0
+    total_time = 0.0
+    for name in names:
+        board = Board.from_fen(positions[name])
+        print(f"\n=== {name}: {positions[name]} ===")
+        if args.divide:
+            for (from_pos, to_pos), nodes in board.divide(args.depth).items():
+                print(f"{format_square(from_pos)}{format_square(to_pos)}: {nodes}")
+        for depth in range(1, args.depth + 1):
+            nodes, elapsed = run_perft(board, depth)
+            nps = nodes / elapsed if elapsed > 0 else 0.0
+            print(f"perft({depth}) = {nodes:>10}  {elapsed:8.3f} с  {nps:12.0f} узлов/с")
+        total_nodes += nodes
+        total_time += elapsed
+        if args.compare:
+            start = time.perf_counter()
+            reference = perft_by_ray_scan(board, args.depth)
+            reference_time = time.perf_counter() - start
+            status = "совпадает" if reference == nodes else "ОШИБКА"
+            print(f"перебор по лучам: {reference:>10}  {reference_time:8.3f} с  ({status}, "
+                  f"ускорение {reference_time / elapsed if elapsed > 0 else 0:.1f}x)")
+
+    if total_time > 0:
+        print(f"\nИтого на глубине {args.depth}: {total_nodes} узлов, "
+              f"{total_nodes / total_time:.0f} узлов/с")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,6 @@
 """
 
 from .tournament import Tournament
+from .cache import EvaluationCache, CachedEvaluator
 
-__all__ = ['Tournament'] 
\ No newline at end of file
+__all__ = ['Tournament', 'EvaluationCache', 'CachedEvaluator'] 
\ No newline at end of file
@@ -0,0 +1,115 @@
+import sys
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from ..game.board import Board, Color
+from ..game.symmetry import canonical_key
+
+# Примерный размер одной записи кэша в байтах: ключ-кортеж
+# (id оценщика, ключ Зобриста, цвет), оценка и узел OrderedDict
+ENTRY_BYTES = (
+    sys.getsizeof((0, 0, Color.WHITE))
+    + sys.getsizeof(1 << 63)
+    + sys.getsizeof(0.0)
+    + 100
+)
+
+DEFAULT_CACHE_MEMORY_MB = 64.0
+
+class EvaluationCache:
+    """
+    Общий LRU-кэш оценок позиций для нескольких функций оценки.
+    Ключ — (id оценщика, ключ Зобриста позиции, цвет); ключ Зобриста
+    учитывает и очередь хода. Для симметричных оценщиков ключ берется
+    канонический (см. symmetry.canonical_key), и отражения позиции
+    делят одну запись. Число записей ограничено max_entries
+    и объемом памяти max_memory_mb (по оценке ENTRY_BYTES на запись).
+    """
+
+    def __init__(self, max_memory_mb: float = DEFAULT_CACHE_MEMORY_MB,
+                 max_entries: Optional[int] = None):
+        capacity = int(max_memory_mb * 1024 * 1024) // ENTRY_BYTES
+        if max_entries is not None:
+            capacity = min(capacity, max_entries)
+        if capacity <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[Hashable, int, Color], float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def evaluate(self, evaluator_id: Hashable, evaluation_function: Callable,
+                 board: Board, color: Color, mirror: bool = False,
+                 color_flip: bool = False) -> float:
+        """
+        Возвращает оценку из кэша или вызывает функцию и запоминает результат.
+        mirror и color_flip включают канонизацию ключа; их можно задавать
+        только для оценщиков с соответствующими симметриями.
+        """
+        if mirror or color_flip:
+            position_key, key_color = canonical_key(board, color, mirror, color_flip)
+            key = (evaluator_id, position_key, key_color)
+        else:
+            key = (evaluator_id, board.zobrist_key, color)
+        entries = self._entries
+        score = entries.get(key)
+        if score is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return score
+        self.misses += 1
+        score = evaluation_function(board, color)
+        entries[key] = score
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return score
+
+    def wrap(self, evaluator_id: Hashable, evaluation_function: Callable,
+             mirror: Optional[bool] = None, color_flip: Optional[bool] = None) -> 'CachedEvaluator':
+        """
+        Оборачивает функцию оценки так, чтобы она шла через этот кэш.
+        По умолчанию симметрии берутся из атрибутов функции
+        mirror_symmetric и color_symmetric.
+        """
+        if mirror is None:
+            mirror = bool(getattr(evaluation_function, 'mirror_symmetric', False))
+        if color_flip is None:
+            color_flip = bool(getattr(evaluation_function, 'color_symmetric', False))
+        return CachedEvaluator(self, evaluator_id, evaluation_function, mirror, color_flip)
+
+    def clear(self):
+        """Очищает кэш (счетчики сохраняются)"""
+        self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, float]:
+        """Возвращает счетчики попаданий, промахов и вытеснений"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0,
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "memory_bytes": len(self._entries) * ENTRY_BYTES
+        }
+
+class CachedEvaluator:
+    """Функция оценки участника, вызовы которой идут через EvaluationCache"""
+
+    def __init__(self, cache: EvaluationCache, evaluator_id: Hashable,
+                 evaluation_function: Callable, mirror: bool = False,
+                 color_flip: bool = False):
+        self.cache = cache
+        self.evaluator_id = evaluator_id
+        self.evaluation_function = evaluation_function
+        self.mirror = mirror
+        self.color_flip = color_flip
+
+    def __call__(self, board: Board, color: Color) -> float:
+        return self.cache.evaluate(self.evaluator_id, self.evaluation_function, board, color,
+                                   self.mirror, self.color_flip)
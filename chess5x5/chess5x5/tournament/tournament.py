@@ -1,16 +1,61 @@
-from typing import List, Dict, Tuple, Callable
+from typing import List, Dict, Tuple, Callable, Optional
 from ..game.game import Game
 from ..game.board import Color
+from ..game.profiling import EvaluatorProfile, ProfiledEvaluator, memory_tracing
+from ..game.clock import OVERRUN_FORFEIT
+from ..game.decisions import DecisionCache, evaluator_hash
+from .cache import EvaluationCache, DEFAULT_CACHE_MEMORY_MB
 
 class Tournament:
-    def __init__(self, participants: List[Tuple[str, Callable]]):
+    def __init__(self, participants: List[Tuple[str, Callable]],
+                 cache_memory_mb: Optional[float] = DEFAULT_CACHE_MEMORY_MB,
+                 trace_memory: bool = False,
+                 time_budget: Optional[float] = None,
+                 call_time_limit: Optional[float] = None,
+                 overrun_policy: str = OVERRUN_FORFEIT,
+                 decision_cache: Optional[DecisionCache] = None):
         """
         Инициализация турнира
         participants: список кортежей (имя_участника, функция_оценки)
+        cache_memory_mb: лимит памяти общего кэша оценок; None — без кэша.
+        Функции оценки участников должны быть чистыми: одна и та же
+        позиция оценивается один раз, дальше оценка берется из кэша.
+        trace_memory: замерять пик памяти вызовов через tracemalloc (медленно)
+        time_budget, call_time_limit, overrun_policy: контроль времени
+        в каждой партии (см. Game); с бюджетом время функций оценки
+        участников не больше 2 * time_budget на партию. Ходы без оценки
+        (политики skip и fallback) часы не тратят, их число ограничено
+        лимитом ходов партии (Game.max_moves)
+        decision_cache: постоянный кэш выбранных ходов (см. decisions.py);
+        используется для участников с атрибутом source_hash у функции оценки
         """
+        self.time_control = {
+            "time_budget": time_budget,
+            "call_time_limit": call_time_limit,
+            "overrun_policy": overrun_policy
+        }
+        self.trace_memory = trace_memory
+        self.decision_cache = decision_cache
+        self.evaluator_hashes: Dict[str, Optional[str]] = {
+            name: evaluator_hash(eval_func) for name, eval_func in participants
+        }
+        # Профиль каждого участника; в него попадают только настоящие
+        # вызовы функции оценки, попадания в кэш не считаются
+        self.profiles: Dict[str, EvaluatorProfile] = {name: EvaluatorProfile() for name, _ in participants}
+        participants = [
+            (name, ProfiledEvaluator(eval_func, self.profiles[name], trace_memory))
+            for name, eval_func in participants
+        ]
+        self.cache = EvaluationCache(cache_memory_mb) if cache_memory_mb is not None else None
+        if self.cache is not None:
+            participants = [
+                (name, self.cache.wrap(index, eval_func))
+                for index, (name, eval_func) in enumerate(participants)
+            ]
         self.participants = participants
         self.scores: Dict[str, float] = {name: 0.0 for name, _ in participants}
         self.matches_played: Dict[str, int] = {name: 0 for name, _ in participants}
+        self.time_overruns: Dict[str, int] = {name: 0 for name, _ in participants}
     
     def play_tournament(self) -> List[Tuple[str, float]]:
         """
@@ -25,18 +70,23 @@ class Tournament:
         print(f"Всего матчей: {total_matches}")
         print("=" * 50)
         
-        # Каждый участник играет с каждым дважды
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    current_match += 1
-                    print(f"\nМатч {current_match}/{total_matches}")
-                    print(f"{self.participants[i][0]} (белые) vs {self.participants[j][0]} (черные)")
-                    self._play_match(
-                        self.participants[i][0], self.participants[i][1],
-                        self.participants[j][0], self.participants[j][1],
-                        Color.WHITE
-                    )
+        # Каждый участник играет с каждым дважды; tracemalloc выключается
+        # и при исключении в матче
+        with memory_tracing(self.trace_memory):
+            for i in range(n):
+                for j in range(n):
+                    if i != j:
+                        current_match += 1
+                        print(f"\nМатч {current_match}/{total_matches}")
+                        print(f"{self.participants[i][0]} (белые) vs {self.participants[j][0]} (черные)")
+                        self._play_match(
+                            self.participants[i][0], self.participants[i][1],
+                            self.participants[j][0], self.participants[j][1],
+                            Color.WHITE
+                        )
+        
+        if self.decision_cache is not None:
+            self.decision_cache.flush()
         
         print("\n=== Итоги турнира ===")
         results = sorted(
@@ -56,13 +106,24 @@ class Tournament:
         """
         Проводит матч между двумя участниками
         """
+        second_player_color = Color.BLACK if first_player_color == Color.WHITE else Color.WHITE
         game = Game(
             white_eval=player1_eval if first_player_color == Color.WHITE else player2_eval,
-            black_eval=player2_eval if first_player_color == Color.WHITE else player1_eval
+            black_eval=player2_eval if first_player_color == Color.WHITE else player1_eval,
+            decision_cache=self.decision_cache,
+            evaluator_hashes={
+                first_player_color: self.evaluator_hashes[player1_name],
+                second_player_color: self.evaluator_hashes[player2_name]
+            },
+            **self.time_control
         )
         
         winner = game.play_game()
         
+        if game.clock is not None:
+            self.time_overruns[player1_name] += game.clock.overruns[first_player_color]
+            self.time_overruns[player2_name] += game.clock.overruns[second_player_color]
+        
         # Обновляем статистику
         self.matches_played[player1_name] += 1
         self.matches_played[player2_name] += 1
@@ -89,7 +150,21 @@ class Tournament:
             name: {
                 "score": score,
                 "matches_played": self.matches_played[name],
-                "win_rate": score / self.matches_played[name] if self.matches_played[name] > 0 else 0
+                "win_rate": score / self.matches_played[name] if self.matches_played[name] > 0 else 0,
+                "time_overruns": self.time_overruns[name],
+                **self.profiles[name].summary()
             }
             for name, score in self.scores.items()
-        } 
\ No newline at end of file
+        }
+    
+    def get_cache_statistics(self) -> Optional[Dict[str, float]]:
+        """
+        Возвращает статистику кэша оценок (None, если кэш выключен)
+        """
+        return self.cache.get_statistics() if self.cache is not None else None 
+    
+    def get_decision_statistics(self) -> Optional[Dict[str, float]]:
+        """
+        Возвращает статистику кэша решений (None, если он не задан)
+        """
+        return self.decision_cache.get_statistics() if self.decision_cache is not None else None
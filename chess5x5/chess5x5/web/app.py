@@ -7,9 +7,25 @@ import io
 from datetime import datetime
 from chess5x5.game.board import Board, Color
 from chess5x5.tournament.tournament import Tournament
+from chess5x5.game.clock import OVERRUN_FORFEIT
+from chess5x5.game.decisions import DecisionCache, source_hash
 
 app = Flask(__name__)
 
+# Контроль времени: секунд на оценку каждой стороне за партию,
+# мягкий лимит на один вызов и политика при перерасходе
+GAME_TIME_BUDGET = 10.0
+CALL_TIME_LIMIT = 1.0
+OVERRUN_POLICY = OVERRUN_FORFEIT
+
+# Замер пика памяти оценщиков (tracemalloc) замедляет каждый вызов в разы,
+# и это время идет в часы партии; без него колонки памяти в результатах нет
+TRACE_MEMORY = False
+
+# Файл кэша решений: ходы оценщиков сохраняются между турнирами
+# под хэшем содержимого загруженного файла
+DECISION_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'cache', 'decisions.sqlite')
+
 # Глобальные переменные
 participants = []
 tournament_results = None
@@ -17,7 +33,7 @@ tournament_statistics = None
 
 @app.route('/')
 def index():
-    return render_template('index.html', participants=participants)
+    return render_template('index.html', participants=participants, trace_memory=TRACE_MEMORY)
 
 @app.route('/upload', methods=['POST'])
 def upload_evaluation():
@@ -45,6 +61,9 @@ def upload_evaluation():
             temp_path = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
             file.save(temp_path)
             
+            with open(temp_path, 'rb') as source:
+                content_hash = source_hash(source.read())
+            
             # Загружаем модуль
             spec = importlib.util.spec_from_file_location("evaluation_module", temp_path)
             module = importlib.util.module_from_spec(spec)
@@ -65,6 +84,12 @@ def upload_evaluation():
                 os.remove(temp_path)
                 continue
             
+            # Хэш содержимого файла — ключ участника в кэше решений
+            try:
+                module.evaluate_position.source_hash = content_hash
+            except AttributeError:
+                pass
+            
             # Добавляем участника
             participant_name = os.path.splitext(file.filename)[0]
             participants.append((participant_name, module.evaluate_position))
@@ -93,13 +118,22 @@ def start_tournament():
         return jsonify({'error': 'Недостаточно участников для турнира'}), 400
     
     try:
-        tournament = Tournament(participants)
-        tournament_results = tournament.play_tournament()
-        tournament_statistics = tournament.get_statistics()
+        with DecisionCache(DECISION_CACHE_PATH) as decision_cache:
+            tournament = Tournament(
+                participants,
+                trace_memory=TRACE_MEMORY,
+                time_budget=GAME_TIME_BUDGET,
+                call_time_limit=CALL_TIME_LIMIT,
+                overrun_policy=OVERRUN_POLICY,
+                decision_cache=decision_cache
+            )
+            tournament_results = tournament.play_tournament()
+            tournament_statistics = tournament.get_statistics()
         
         return jsonify({
             'results': tournament_results,
-            'statistics': tournament_statistics
+            'statistics': tournament_statistics,
+            'trace_memory': TRACE_MEMORY
         })
     
     except Exception as e:
@@ -115,18 +149,29 @@ def download_results():
     writer = csv.writer(output)
     
     # Записываем заголовок
-    writer.writerow(['Место', 'Участник', 'Очки', 'Сыграно матчей', 'Процент побед'])
+    # Пик памяти без tracemalloc не замеряется — колонку не выводим
+    memory_header = ['Пик памяти, КБ'] if TRACE_MEMORY else []
+    writer.writerow(['Место', 'Участник', 'Очки', 'Сыграно матчей', 'Процент побед',
+                     'Вызовов оценки', 'Время оценки, с', 'p50, мс', 'p90, мс', 'p99, мс',
+                     'Время CPU, с'] + memory_header + ['Превышений времени'])
     
     # Записываем данные
     for i, (name, score) in enumerate(tournament_results, 1):
         stats = tournament_statistics[name]
+        memory = [f"{stats['eval_peak_memory']/1024:.1f}"] if TRACE_MEMORY else []
         writer.writerow([
             i,
             name,
             f"{score:.1f}",
             stats['matches_played'],
-            f"{stats['win_rate']*100:.1f}%"
-        ])
+            f"{stats['win_rate']*100:.1f}%",
+            stats['eval_calls'],
+            f"{stats['eval_time_total']:.3f}",
+            f"{stats['eval_time_p50']*1000:.3f}",
+            f"{stats['eval_time_p90']*1000:.3f}",
+            f"{stats['eval_time_p99']*1000:.3f}",
+            f"{stats['eval_cpu_time']:.3f}"
+        ] + memory + [stats['time_overruns']])
     
     # Создаем файл для скачивания
     output.seek(0)
@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+project_root = Path(__file__).parent
+sys.path.append(str(project_root))
+
+from chess5x5.perft import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+from typing import Optional
+from chess5x5.game.board import Board, Color
+from chess5x5.game.decisions import source_hash
+from chess5x5.game.evaluation import PositionEvaluator
+
+class CountingEvaluator:
+    """
+    Функция оценки, считающая свои вызовы. С source у нее есть
+    атрибут source_hash, и она проходит через кэш решений.
+    """
+    def __init__(self, source: Optional[str] = None):
+        self.calls = 0
+        self.evaluator = PositionEvaluator()
+        if source is not None:
+            self.source_hash = source_hash(source)
+    
+    def __call__(self, board: Board, color: Color) -> float:
+        self.calls += 1
+        return self.evaluator.evaluate_position(board, color)
@@ -0,0 +1,360 @@
+import copy
+import io
+import pickle
+import random
+import unittest
+from contextlib import redirect_stdout
+from chess5x5.game.board import (
+    Board, Color, Piece, PieceType, square_index, START_FEN,
+    MOVE_CAPTURE, MOVE_PROMOTION, decode_move, encode_move, new_move_buffer,
+    BISHOP_RAYS, KING_TARGETS, PAWN_CAPTURES, PAWN_PUSHES, ROOK_RAYS,
+)
+from chess5x5.game.ai import AlphaBetaAI
+from chess5x5.game.game import Game
+
+
+def trying_evaluation(board: Board, color: Color) -> float:
+    """
+    Функция оценки в духе старого API: пробует ходы через move_piece
+    и возвращает позицию присваиванием клеток
+    """
+    score = 0.0
+    for row in range(5):
+        for col in range(5):
+            piece = board.get_piece(row, col)
+            if piece is None or piece.color != color:
+                continue
+            for to_row, to_col in board.get_legal_moves(row, col):
+                captured = board.get_piece(to_row, to_col)
+                board.move_piece((row, col), (to_row, to_col))
+                score += 0.01 * (not board.is_king_under_attack(color))
+                board.move_piece((to_row, to_col), (row, col))
+                board.board[row][col] = piece
+                board.board[to_row][to_col] = captured
+            score += 1.0
+    return score
+
+
+class TestBoard(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+
+    def test_initial_bitboards(self):
+        """Проверка масок начальной позиции"""
+        self.assertEqual(bin(self.board.occupied).count("1"), 20)
+        self.assertEqual(self.board.occupancy[Color.WHITE] & self.board.occupancy[Color.BLACK], 0)
+        self.assertEqual(self.board.bitboards[(PieceType.KING, Color.WHITE)], 1 << square_index(4, 2))
+        self.assertEqual(self.board.bitboards[(PieceType.KING, Color.BLACK)], 1 << square_index(0, 2))
+
+    def test_move_tables(self):
+        """Проверка предвычисленных таблиц ходов"""
+        corner = square_index(0, 0)
+        center = square_index(2, 2)
+        self.assertEqual(ROOK_RAYS[corner], ((1, 2, 3, 4), (5, 10, 15, 20)))
+        self.assertEqual(BISHOP_RAYS[corner], ((6, 12, 18, 24),))
+        self.assertEqual(len(KING_TARGETS[corner]), 3)
+        self.assertEqual(len(KING_TARGETS[center]), 8)
+        self.assertEqual(PAWN_PUSHES[Color.WHITE][square_index(3, 1)], (square_index(2, 1), square_index(1, 1)))
+        self.assertEqual(PAWN_PUSHES[Color.BLACK][square_index(2, 1)], (square_index(3, 1),))
+        self.assertEqual(PAWN_CAPTURES[Color.WHITE][square_index(3, 0)], (square_index(2, 1),))
+        self.assertEqual(PAWN_PUSHES[Color.WHITE][square_index(0, 3)], ())
+
+    def test_board_view_write(self):
+        """Запись через board[row][col] обновляет маски"""
+        self.board.board = [[None for _ in range(5)] for _ in range(5)]
+        self.assertEqual(self.board.occupied, 0)
+
+        rook = Piece(PieceType.ROOK, Color.WHITE)
+        self.board.board[2][2] = rook
+        self.assertIs(self.board.get_piece(2, 2), rook)
+        self.assertIs(self.board.board[2][2], rook)
+        self.assertEqual(self.board.occupancy[Color.WHITE], 1 << square_index(2, 2))
+        self.assertEqual(len(self.board.get_legal_moves(2, 2)), 8)
+
+        self.board.board[2][2] = None
+        self.assertEqual(self.board.occupied, 0)
+
+    def test_move_and_promotion(self):
+        """Ход пешки на последнюю горизонталь превращает ее в ладью"""
+        self.board.board = [[None for _ in range(5)] for _ in range(5)]
+        self.board.board[1][0] = Piece(PieceType.PAWN, Color.WHITE)
+        self.board.move_piece((1, 0), (0, 0))
+        self.assertIsNone(self.board.get_piece(1, 0))
+        self.assertEqual(self.board.get_piece(0, 0).type, PieceType.ROOK)
+        self.assertEqual(self.board.bitboards[(PieceType.PAWN, Color.WHITE)], 0)
+        self.assertEqual(self.board.bitboards[(PieceType.ROOK, Color.WHITE)], 1)
+
+    def test_move_piece_is_not_recorded(self):
+        """move_piece не пишет в undo_stack и не меняет очередь хода"""
+        key = self.board.zobrist_key
+        self.board.move_piece((3, 0), (2, 0))
+        self.assertEqual(self.board.undo_stack, [])
+        self.assertEqual(self.board.side_to_move, Color.WHITE)
+        self.board.move_piece((2, 0), (3, 0))
+        self.assertEqual(self.board.zobrist_key, key)
+        self.assertEqual(self.board.to_fen(), START_FEN)
+
+    def test_evaluator_trying_moves(self):
+        """Функция оценки, пробующая ходы через move_piece, не ломает Game и AlphaBetaAI"""
+        game = Game(trying_evaluation, trying_evaluation, max_moves=10)
+        with redirect_stdout(io.StringIO()):
+            game.play_game()
+        self.assertGreater(len(game.move_history), 0)
+        self.assertEqual(len(game.board.undo_stack), len(game.move_history))
+
+        board = Board()
+        ai = AlphaBetaAI(trying_evaluation)
+        self.assertIsNotNone(ai.get_best_move(board, Color.WHITE, 2))
+        self.assertEqual(board.undo_stack, [])
+        self.assertEqual(board.to_fen(), START_FEN)
+
+    def test_unmake_restores_promotion_and_capture(self):
+        """Отмена хода возвращает пешку и взятую фигуру"""
+        self.board.board = [[None for _ in range(5)] for _ in range(5)]
+        pawn = Piece(PieceType.PAWN, Color.WHITE)
+        bishop = Piece(PieceType.BISHOP, Color.BLACK)
+        self.board.board[1][0] = pawn
+        self.board.board[0][1] = bishop
+        before = dict(self.board.bitboards)
+
+        record = self.board.make_move((1, 0), (0, 1))
+        self.assertTrue(record.promoted)
+        self.assertIs(record.captured, bishop)
+        self.assertEqual(self.board.get_piece(0, 1).type, PieceType.ROOK)
+
+        self.board.unmake_move(record)
+        self.assertIs(self.board.get_piece(1, 0), pawn)
+        self.assertIs(self.board.get_piece(0, 1), bishop)
+        self.assertEqual(self.board.bitboards, before)
+        self.assertEqual(self.board.undo_stack, [])
+
+    def test_unmake_only_last_move(self):
+        """Отменить можно только последний ход"""
+        first = self.board.make_move((3, 0), (2, 0))
+        self.board.make_move((1, 0), (2, 1))
+        with self.assertRaises(ValueError):
+            self.board.unmake_move(first)
+
+    def test_zobrist_key_is_incremental(self):
+        """Инкрементальный ключ совпадает с пересчитанным с нуля"""
+        rnd = random.Random(7)
+        initial_key = self.board.zobrist_key
+        records = []
+        for _ in range(30):
+            if self.board.is_king_captured():
+                break
+            moves = [((row, col), move)
+                     for row in range(5) for col in range(5)
+                     if self.board.get_piece(row, col)
+                     and self.board.get_piece(row, col).color == self.board.side_to_move
+                     for move in self.board.get_legal_moves(row, col)]
+            records.append(self.board.make_move(*rnd.choice(moves)))
+            self.assertEqual(self.board.zobrist_key, self.board.compute_zobrist_key())
+        for record in reversed(records):
+            self.board.unmake_move(record)
+        self.assertEqual(self.board.zobrist_key, initial_key)
+        self.assertEqual(self.board.side_to_move, Color.WHITE)
+
+    def test_zobrist_transposition(self):
+        """Разный порядок ходов приводит к одному ключу, очередь хода учитывается"""
+        other = Board()
+        for from_pos, to_pos in [((3, 0), (2, 0)), ((1, 0), (2, 1)), ((3, 4), (2, 4)), ((1, 4), (2, 3))]:
+            self.board.move_piece(from_pos, to_pos)
+        for from_pos, to_pos in [((3, 4), (2, 4)), ((1, 4), (2, 3)), ((3, 0), (2, 0)), ((1, 0), (2, 1))]:
+            other.move_piece(from_pos, to_pos)
+        self.assertEqual(self.board.zobrist_key, other.zobrist_key)
+        other.set_side_to_move(Color.BLACK)
+        self.assertNotEqual(self.board.zobrist_key, other.zobrist_key)
+
+    def test_square_attacked_matches_enemy_moves(self):
+        """Обратный поиск атак совпадает с перебором ходов соперника"""
+        rnd = random.Random(11)
+        for _ in range(20):
+            board = Board()
+            for _ in range(rnd.randint(0, 20)):
+                if board.is_king_captured():
+                    break
+                moves = [((row, col), move)
+                         for row in range(5) for col in range(5)
+                         if board.get_piece(row, col)
+                         and board.get_piece(row, col).color == board.side_to_move
+                         for move in board.get_legal_moves(row, col)]
+                board.make_move(*rnd.choice(moves))
+            for row in range(5):
+                for col in range(5):
+                    target = board.get_piece(row, col)
+                    if not target:
+                        continue
+                    enemy = Color.BLACK if target.color == Color.WHITE else Color.WHITE
+                    expected = any(
+                        (row, col) in board.get_legal_moves(r, c)
+                        for r in range(5) for c in range(5)
+                        if board.get_piece(r, c) and board.get_piece(r, c).color == enemy
+                    )
+                    self.assertEqual(board.is_square_attacked((row, col), enemy), expected)
+
+    def test_king_square_tracking(self):
+        """Клетка короля обновляется при ходе и отмене"""
+        self.board.board = [[None for _ in range(5)] for _ in range(5)]
+        self.board.board[2][2] = Piece(PieceType.KING, Color.WHITE)
+        self.board.board[2][4] = Piece(PieceType.ROOK, Color.BLACK)
+        self.assertEqual(self.board.king_squares[Color.WHITE], square_index(2, 2))
+        self.assertIsNone(self.board.king_squares[Color.BLACK])
+        self.assertTrue(self.board.is_king_under_attack(Color.WHITE))
+
+        record = self.board.make_move((2, 2), (1, 1))
+        self.assertEqual(self.board.king_squares[Color.WHITE], square_index(1, 1))
+        self.assertFalse(self.board.is_king_under_attack(Color.WHITE))
+        self.board.unmake_move(record)
+        self.assertEqual(self.board.king_squares[Color.WHITE], square_index(2, 2))
+
+    def test_piece_lists_and_counts(self):
+        """Списки фигур и счетчики материала следуют за ходами"""
+        self.assertEqual(self.board.piece_lists[Color.BLACK], list(range(10)))
+        self.assertEqual(self.board.piece_counts[(PieceType.PAWN, Color.WHITE)], 5)
+
+        record = self.board.make_move((3, 1), (1, 1))
+        self.assertEqual(self.board.piece_counts[(PieceType.PAWN, Color.BLACK)], 4)
+        self.assertNotIn(square_index(3, 1), self.board.piece_lists[Color.WHITE])
+        self.assertIn(square_index(1, 1), self.board.piece_lists[Color.WHITE])
+        self.assertNotIn(square_index(1, 1), self.board.piece_lists[Color.BLACK])
+
+        self.board.unmake_move(record)
+        self.assertEqual(self.board.piece_lists[Color.BLACK], list(range(10)))
+        self.assertEqual(self.board.piece_counts[(PieceType.PAWN, Color.BLACK)], 5)
+
+    def test_all_moves_in_scan_order(self):
+        """get_all_moves совпадает с обходом доски через get_legal_moves"""
+        self.board.make_move((3, 2), (2, 2))
+        expected = [((row, col), move)
+                    for row in range(5) for col in range(5)
+                    if self.board.get_piece(row, col)
+                    and self.board.get_piece(row, col).color == Color.WHITE
+                    for move in self.board.get_legal_moves(row, col)]
+        self.assertEqual(self.board.get_all_moves(Color.WHITE), expected)
+
+    def test_generate_moves_encoding(self):
+        """Закодированные ходы совпадают с get_all_moves и несут флаги"""
+        self.board.make_move((3, 2), (2, 2))
+        buffer = new_move_buffer()
+        moves = self.board.generate_moves(Color.BLACK, buffer)
+        self.assertIs(moves, buffer)
+        self.assertEqual([decode_move(move) for move in moves], self.board.get_all_moves(Color.BLACK))
+
+        self.board.board = [[None for _ in range(5)] for _ in range(5)]
+        self.board.board[1][1] = Piece(PieceType.PAWN, Color.WHITE)
+        self.board.board[0][2] = Piece(PieceType.KING, Color.BLACK)
+        moves = self.board.generate_moves(Color.WHITE, buffer)
+        self.assertEqual(sorted(moves), sorted([
+            encode_move(square_index(1, 1), square_index(0, 1), promotion=True),
+            encode_move(square_index(1, 1), square_index(0, 2), promotion=True, capture=True),
+        ]))
+        capture = [move for move in moves if move & MOVE_CAPTURE][0]
+        self.assertTrue(capture & MOVE_PROMOTION)
+        record = self.board.make_encoded_move(capture)
+        self.assertTrue(record.promoted)
+        self.assertTrue(self.board.is_king_captured())
+
+    def test_piece_flyweight(self):
+        """Одна неизменяемая фигура на пару (тип, цвет)"""
+        rook = Piece(PieceType.ROOK, Color.WHITE)
+        self.assertIs(Piece(PieceType.ROOK, Color.WHITE), rook)
+        self.assertIsNot(Piece(PieceType.ROOK, Color.BLACK), rook)
+        self.assertIs(copy.deepcopy(rook), rook)
+        self.assertIs(pickle.loads(pickle.dumps(rook)), rook)
+        with self.assertRaises(AttributeError):
+            rook.type = PieceType.PAWN
+        with self.assertRaises(AttributeError):
+            rook.value = 5
+
+    def test_board_copy_is_independent(self):
+        """Копия доски не зависит от оригинала"""
+        clone = copy.deepcopy(self.board)
+        clone.make_move((3, 0), (2, 0))
+        self.assertIsNone(clone.get_piece(3, 0))
+        self.assertIs(self.board.get_piece(3, 0), Piece(PieceType.PAWN, Color.WHITE))
+        self.assertNotEqual(clone.zobrist_key, self.board.zobrist_key)
+        self.assertEqual(self.board.piece_lists[Color.WHITE], list(range(15, 25)))
+        self.assertEqual(self.board.undo_stack, [])
+
+    def test_bytes_round_trip(self):
+        """25 байт позиции, включая очередь хода"""
+        data = self.board.to_bytes()
+        self.assertEqual(len(data), 25)
+        self.board.make_move((3, 1), (1, 1))
+        data = self.board.to_bytes()
+        self.assertEqual(len(data), 25)
+        restored = Board.from_bytes(data)
+        self.assertEqual(restored.side_to_move, Color.BLACK)
+        self.assertEqual(restored.zobrist_key, self.board.zobrist_key)
+        self.assertEqual(restored.bitboards, self.board.bitboards)
+        self.assertEqual(restored.piece_lists, self.board.piece_lists)
+        self.assertEqual(restored.to_bytes(), data)
+        self.assertEqual(pickle.loads(pickle.dumps(self.board)).to_bytes(), data)
+        with self.assertRaises(ValueError):
+            Board.from_bytes(data[:24])
+        with self.assertRaises(ValueError):
+            Board.from_bytes(bytes([0x7F]) + data[1:])
+
+    def test_fen_round_trip(self):
+        """Текстовая запись позиции"""
+        self.assertEqual(self.board.to_fen(), START_FEN)
+        self.board.make_move((3, 1), (1, 1))
+        fen = self.board.to_fen()
+        self.assertEqual(fen, "rbkbr/pPppp/5/P1PPP/RBKBR b")
+        restored = Board.from_fen(fen)
+        self.assertEqual(restored.to_bytes(), self.board.to_bytes())
+        self.assertEqual(Board.from_fen("2k2/5/5/5/2K2").side_to_move, Color.WHITE)
+        for bad in ["rbkbr/ppppp/5/PPPPP w", "rbkbr/ppppp/6/PPPPP/RBKBR w",
+                    "rbkbr/ppxpp/5/PPPPP/RBKBR w", "rbkbr/ppppp/5/PPPPP/RBKBR x"]:
+            with self.assertRaises(ValueError):
+                Board.from_fen(bad)
+
+    def test_king_captured(self):
+        """Взятие короля завершает партию"""
+        self.assertFalse(self.board.is_king_captured())
+        self.board.board[0][2] = None
+        self.assertTrue(self.board.is_king_captured())
+
+
+    def test_attack_maps(self):
+        """Карты атак совпадают с обратным поиском атак и с генератором ходов"""
+        rnd = random.Random(5)
+        for _ in range(20):
+            board = Board()
+            for _ in range(rnd.randint(0, 20)):
+                moves = board.get_all_moves(board.side_to_move)
+                if board.is_king_captured() or not moves:
+                    break
+                board.make_move(*rnd.choice(moves))
+            maps = board.attack_maps()
+            for color in Color:
+                for row in range(5):
+                    for col in range(5):
+                        self.assertEqual(maps.is_attacked(row, col, color),
+                                         board.is_square_attacked((row, col), color))
+                        piece = board.get_piece(row, col)
+                        if piece and piece.color == color:
+                            self.assertEqual(maps.piece_mobility(row, col),
+                                             len(board.get_legal_moves(row, col)))
+                self.assertEqual(maps.total_mobility[color], len(board.generate_moves(color)))
+
+    def test_attack_maps_counts_and_memo(self):
+        """Счетчики атак и защит; карты запоминаются до изменения позиции"""
+        maps = self.board.attack_maps()
+        self.assertIs(self.board.attack_maps(), maps)
+        # Пешку a2 защищают ладья a1 и слон b1
+        self.assertEqual(maps.defenders(3, 0), 2)
+        self.assertEqual(maps.defenders(2, 2), 0)
+        # Клетку b3 бьют пешки a2 и c2 и пешки a4 и c4
+        self.assertEqual(maps.attackers(2, 1, Color.WHITE), 2)
+        self.assertEqual(maps.attackers(2, 1, Color.BLACK), 2)
+        self.assertFalse(maps.is_attacked(4, 0, Color.BLACK))
+        record = self.board.make_move((3, 0), (2, 0))
+        self.assertIsNot(self.board.attack_maps(), maps)
+        self.board.unmake_move(record)
+        self.assertEqual(self.board.attack_maps().attack_counts, maps.attack_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
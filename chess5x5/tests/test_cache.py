@@ -0,0 +1,66 @@
+import unittest
+from contextlib import redirect_stdout
+import io
+from chess5x5.game.board import Board, Color
+from chess5x5.tournament.cache import EvaluationCache
+from chess5x5.tournament.tournament import Tournament
+from helpers import CountingEvaluator
+
+class TestEvaluationCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        """Повторная оценка той же позиции берется из кэша"""
+        cache = EvaluationCache()
+        evaluator = CountingEvaluator()
+        cached = cache.wrap(0, evaluator)
+        board = Board()
+        first = cached(board, Color.WHITE)
+        self.assertEqual(cached(board, Color.WHITE), first)
+        cached(board, Color.BLACK)
+        self.assertEqual(evaluator.calls, 2)
+        stats = cache.get_statistics()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        
+        # У другого оценщика свои записи
+        cache.wrap(1, evaluator)(board, Color.WHITE)
+        self.assertEqual(evaluator.calls, 3)
+    
+    def test_eviction(self):
+        """При переполнении вытесняется давно не использованная запись"""
+        cache = EvaluationCache(max_entries=2)
+        evaluator = CountingEvaluator()
+        cached = cache.wrap(0, evaluator)
+        board = Board()
+        cached(board, Color.WHITE)
+        record = board.make_move((3, 0), (2, 0))
+        cached(board, Color.WHITE)
+        board.unmake_move(record)
+        cached(board, Color.WHITE)  # начальная позиция становится свежей
+        board.make_move((3, 1), (2, 1))
+        cached(board, Color.WHITE)  # вытесняет позицию после первого хода
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_statistics()["evictions"], 1)
+        board.unmake_move()
+        cached(board, Color.WHITE)
+        self.assertEqual(evaluator.calls, 3)
+    
+    def test_memory_cap(self):
+        """Лимит памяти ограничивает число записей"""
+        cache = EvaluationCache(max_memory_mb=0.01)
+        self.assertLessEqual(cache.capacity * 100, 0.01 * 1024 * 1024)
+        with self.assertRaises(ValueError):
+            EvaluationCache(max_memory_mb=0)
+    
+    def test_tournament_results_unchanged(self):
+        """Кэш не меняет результатов турнира"""
+        def participants():
+            return [(name, CountingEvaluator()) for name in ("first", "second", "third")]
+        
+        with redirect_stdout(io.StringIO()):
+            plain = Tournament(participants(), cache_memory_mb=None)
+            cached = Tournament(participants())
+            self.assertEqual(plain.play_tournament(), cached.play_tournament())
+        self.assertIsNone(plain.get_cache_statistics())
+        self.assertGreater(cached.get_cache_statistics()["hits"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
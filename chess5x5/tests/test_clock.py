@@ -0,0 +1,102 @@
+import io
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from chess5x5.game.board import Board, Color
+from chess5x5.game.clock import GameClock, TimeOverrun, OVERRUN_FALLBACK, OVERRUN_SKIP
+from chess5x5.game.evaluation import PositionEvaluator
+from chess5x5.game.game import Game
+
+evaluator = PositionEvaluator()
+
+def evaluate_position(board: Board, color: Color) -> float:
+    return evaluator.evaluate_position(board, color)
+
+def endless_evaluation(board: Board, color: Color) -> float:
+    while True:
+        try:
+            pass
+        except Exception:
+            # Загруженная функция может глотать исключения — прерывание все равно дойдет
+            pass
+
+def slow_evaluation(board: Board, color: Color) -> float:
+    time.sleep(0.005)
+    return evaluate_position(board, color)
+
+def slow_constant_evaluation(board: Board, color: Color) -> float:
+    time.sleep(0.005)
+    return 0.0
+
+class TestGameClock(unittest.TestCase):
+    def test_budget_interrupts_endless_evaluation(self):
+        """Бесконечная функция оценки прерывается и проигрывает по времени"""
+        game = Game(endless_evaluation, evaluate_position, time_budget=0.1)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            winner = game.play_game()
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertEqual(winner, Color.BLACK)
+        self.assertEqual(game.forfeited, Color.WHITE)
+        self.assertEqual(game.clock.overruns[Color.WHITE], 1)
+    
+    def test_interrupt_in_worker_thread(self):
+        """Сторожевой поток прерывает оценку и вне главного потока"""
+        clock = GameClock(time_budget=0.05)
+        errors = []
+        
+        def worker():
+            try:
+                clock.call(endless_evaluation, Board(), Color.WHITE)
+            except TimeOverrun as overrun:
+                errors.append(overrun)
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(2.0)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].budget_exhausted)
+        self.assertTrue(clock.is_exhausted(Color.WHITE))
+    
+    def test_fallback_policy(self):
+        """При политике fallback сторона доигрывает с оценкой по материалу"""
+        game = Game(slow_evaluation, evaluate_position, call_time_limit=0.001,
+                    overrun_policy=OVERRUN_FALLBACK)
+        with redirect_stdout(io.StringIO()):
+            winner = game.play_game()
+        self.assertIsNotNone(winner)
+        self.assertIsNone(game.forfeited)
+        self.assertEqual(game.clock.overruns[Color.WHITE], 1)
+        self.assertEqual(game.clock.overruns[Color.BLACK], 0)
+    
+    def test_skip_policy(self):
+        """При политике skip после исчерпания бюджета ходы делаются без оценки"""
+        game = Game(slow_evaluation, evaluate_position, time_budget=0.02,
+                    overrun_policy=OVERRUN_SKIP)
+        for _ in range(6):
+            self.assertTrue(game.make_move())
+        self.assertTrue(game.clock.is_exhausted(Color.WHITE))
+        self.assertIsNone(game.forfeited)
+        self.assertEqual(len(game.move_history), 6)
+    
+    def test_skip_policy_game_ends(self):
+        """Партия без оценки после исчерпания бюджета заканчивается по лимиту ходов"""
+        # Ходы без оценки в этой позиции повторяются бесконечно
+        game = Game(slow_constant_evaluation, slow_constant_evaluation, time_budget=0.02,
+                    overrun_policy=OVERRUN_SKIP, max_moves=50)
+        game.board = Board.from_fen("k4/5/5/5/K1R2 w")
+        with redirect_stdout(io.StringIO()):
+            winner = game.play_game()
+        self.assertIsNone(winner)
+        self.assertTrue(game.clock.is_exhausted(Color.WHITE))
+        self.assertTrue(game.clock.is_exhausted(Color.BLACK))
+        self.assertEqual(len(game.move_history), 100)
+    
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            GameClock(time_budget=1.0, policy="ignore")
+
+if __name__ == '__main__':
+    unittest.main()
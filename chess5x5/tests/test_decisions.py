@@ -0,0 +1,148 @@
+import io
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from chess5x5.game.board import Board, Color
+from chess5x5.game.decisions import DecisionCache, source_hash
+from chess5x5.game.evaluation import PositionEvaluator
+from chess5x5.game.game import Game
+from chess5x5.tournament.tournament import Tournament
+from helpers import CountingEvaluator
+
+class SlowEvaluator(CountingEvaluator):
+    """Функция оценки, тратящая на вызов 10 мс"""
+    def __call__(self, board: Board, color: Color) -> float:
+        time.sleep(0.01)
+        return super().__call__(board, color)
+
+class ConstantEvaluator(CountingEvaluator):
+    """Одинаково оценивает все позиции: выбирается первый возможный ход"""
+    def __call__(self, board: Board, color: Color) -> float:
+        self.calls += 1
+        return 0.0
+
+def play(white, black, decision_cache=None):
+    game = Game(white, black, decision_cache=decision_cache)
+    with redirect_stdout(io.StringIO()):
+        winner = game.play_game()
+    return winner, game.get_move_history()
+
+class TestDecisionCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "decisions.sqlite")
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_source_hash(self):
+        self.assertEqual(source_hash("def f(): pass"), source_hash(b"def f(): pass"))
+        self.assertNotEqual(source_hash("def f(): pass"), source_hash("def g(): pass"))
+    
+    def test_persistent_game(self):
+        """Повторная партия с кэшем из файла идет теми же ходами без вызовов оценки"""
+        expected = play(CountingEvaluator("white"), CountingEvaluator("black"))
+        with DecisionCache(self.path) as cache:
+            self.assertEqual(play(CountingEvaluator("white"), CountingEvaluator("black"), cache), expected)
+            stores = cache.stores
+            self.assertEqual(len(cache), stores)
+        
+        white, black = CountingEvaluator("white"), CountingEvaluator("black")
+        with DecisionCache(self.path) as cache:
+            self.assertEqual(play(white, black, cache), expected)
+            self.assertEqual(cache.hits, stores)
+            self.assertEqual(cache.misses, 0)
+        self.assertEqual(white.calls + black.calls, 0)
+    
+    def test_evaluators_are_separate(self):
+        """Оценщик с другим исходником не получает чужих решений"""
+        with DecisionCache(self.path) as cache:
+            play(CountingEvaluator("white"), CountingEvaluator("black"), cache)
+            white = CountingEvaluator("changed")
+            play(white, CountingEvaluator("black"), cache)
+            self.assertGreater(white.calls, 0)
+    
+    def test_functions_without_hash(self):
+        """Функции без source_hash через кэш не проходят"""
+        with DecisionCache() as cache:
+            play(PositionEvaluator(), PositionEvaluator(), cache)
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(cache.hits + cache.misses, 0)
+    
+    def test_stale_move_is_ignored(self):
+        """Невозможный ход из кэша пересчитывается"""
+        board = Board()
+        evaluator = CountingEvaluator("white")
+        with DecisionCache() as cache:
+            cache.put(evaluator.source_hash, board, Color.WHITE, 0, 0.0)
+            game = Game(evaluator, evaluator, decision_cache=cache)
+            self.assertTrue(game.make_move())
+            self.assertGreater(evaluator.calls, 0)
+            self.assertEqual(game.get_move_history(), play(PositionEvaluator(), PositionEvaluator())[1][:1])
+    
+    def test_cycling_game_ends(self):
+        """Партия, повторяющая ходы из кэша, заканчивается по лимиту ходов"""
+        with DecisionCache(self.path) as cache:
+            for _ in range(2):
+                white, black = ConstantEvaluator("white"), ConstantEvaluator("black")
+                game = Game(white, black, time_budget=0.2, decision_cache=cache, max_moves=50)
+                game.board = Board.from_fen("k4/5/5/5/K1R2 w")
+                with redirect_stdout(io.StringIO()):
+                    winner = game.play_game()
+                self.assertIsNone(winner)
+                self.assertEqual(len(game.move_history), 100)
+            # Вторая партия целиком сыграна из кэша, но время оценки списано с часов
+            self.assertEqual(white.calls + black.calls, 0)
+            self.assertLess(game.clock.remaining[Color.WHITE], 0.2)
+    
+    def test_cache_keeps_time_control(self):
+        """С часами кэш не меняет исход: время решений из кэша списывается, перерасход остается"""
+        results = []
+        with DecisionCache(self.path) as cache:
+            for _ in range(2):
+                game = Game(SlowEvaluator("slow"), CountingEvaluator("fast"),
+                            time_budget=0.25, decision_cache=cache)
+                with redirect_stdout(io.StringIO()):
+                    winner = game.play_game()
+                results.append((winner, game.forfeited, game.clock.overruns[Color.WHITE]))
+            self.assertGreater(cache.hits, 0)
+        self.assertEqual(results[0], (Color.BLACK, Color.WHITE, 1))
+        self.assertEqual(results[1], results[0])
+    
+    def test_old_file_format(self):
+        """Файл кэша без времени оценки пересоздается"""
+        connection = sqlite3.connect(self.path)
+        connection.execute("CREATE TABLE decisions (evaluator TEXT NOT NULL, position BLOB NOT NULL,"
+                           " color INTEGER NOT NULL, move INTEGER NOT NULL, PRIMARY KEY (evaluator, position, color))")
+        connection.execute("INSERT INTO decisions VALUES ('white', x'00', 0, 0)")
+        connection.commit()
+        connection.close()
+        with DecisionCache(self.path) as cache:
+            self.assertEqual(len(cache), 0)
+            cache.put("white", Board(), Color.WHITE, 0, 0.5)
+            self.assertEqual(cache.get("white", Board(), Color.WHITE), (0, 0.5))
+    
+    def test_tournament(self):
+        """Повторный турнир с тем же файлом кэша не вызывает функции оценки"""
+        def run():
+            evaluators = [CountingEvaluator(str(index)) for index in range(3)]
+            with DecisionCache(self.path) as cache:
+                tournament = Tournament([(f"p{index}", evaluator) for index, evaluator in enumerate(evaluators)],
+                                        decision_cache=cache)
+                with redirect_stdout(io.StringIO()):
+                    results = tournament.play_tournament()
+                return results, sum(evaluator.calls for evaluator in evaluators), tournament.get_decision_statistics()
+        
+        first_results, first_calls, _ = run()
+        second_results, second_calls, stats = run()
+        self.assertEqual(second_results, first_results)
+        self.assertGreater(first_calls, 0)
+        self.assertEqual(second_calls, 0)
+        self.assertEqual(stats["misses"], 0)
+        self.assertEqual(stats["stores"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
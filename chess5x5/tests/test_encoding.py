@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from chess5x5.game.board import Board, Color, PieceType
+from chess5x5.game.encoding import (
+    NUM_PLANES, SIDE_TO_MOVE_PLANE, decode_boards, decode_positions, encode_positions,
+)
+
+
+class TestEncoding(unittest.TestCase):
+    def setUp(self):
+        self.start = Board()
+        self.moved = Board()
+        self.moved.make_move((3, 1), (1, 1))
+
+    def test_planes_shape_and_content(self):
+        """Плоскости фигур и очереди хода"""
+        planes = encode_positions([self.start, self.moved])
+        self.assertEqual(planes.shape, (2, NUM_PLANES, 5, 5))
+        self.assertEqual(planes.dtype, np.uint8)
+        # У каждой занятой клетки ровно одна плоскость фигуры
+        self.assertEqual(int(planes[0, :SIDE_TO_MOVE_PLANE].sum()), 20)
+        self.assertEqual(int(planes[1, :SIDE_TO_MOVE_PLANE].sum()), 19)
+        self.assertFalse(planes[0, SIDE_TO_MOVE_PLANE].any())
+        self.assertTrue(planes[1, SIDE_TO_MOVE_PLANE].all())
+
+    def test_round_trip(self):
+        """Тензор восстанавливается в те же позиции"""
+        positions = [self.start, self.moved.to_bytes()]
+        planes = encode_positions(positions, dtype=np.float32)
+        self.assertEqual(planes.dtype, np.float32)
+        self.assertEqual(decode_positions(planes), [self.start.to_bytes(), self.moved.to_bytes()])
+        boards = decode_boards(planes)
+        self.assertEqual(boards[1].to_fen(), self.moved.to_fen())
+        self.assertEqual(boards[1].side_to_move, Color.BLACK)
+        self.assertEqual(boards[0].get_piece(4, 2).type, PieceType.KING)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            encode_positions([b"\x00" * 24])
+        planes = encode_positions([self.start])
+        planes[0, 0, 0, 0] = 1
+        with self.assertRaises(ValueError):
+            decode_positions(planes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import random
 import unittest
 from chess5x5.game.board import Board, Color, Piece, PieceType
 from chess5x5.game.evaluation import PositionEvaluator
@@ -59,5 +60,58 @@ class TestEvaluation(unittest.TestCase):
         # В начальной позиции оценка должна быть близка к 0
         self.assertAlmostEqual(score, 0.0, delta=0.1)
 
+class TestBatchEvaluation(unittest.TestCase):
+    def test_batch_matches_scalar(self):
+        """evaluate_batch совпадает с evaluate_position для каждой позиции"""
+        evaluator = PositionEvaluator()
+        board = Board()
+        boards = []
+        for from_pos, to_pos in board.get_all_moves(Color.WHITE):
+            child = board.copy()
+            child.make_move(from_pos, to_pos)
+            boards.append(child)
+        for color in (Color.WHITE, Color.BLACK):
+            scores = evaluator.evaluate_batch([b.to_bytes() for b in boards], color)
+            self.assertEqual(scores.shape, (len(boards),))
+            for child, score in zip(boards, scores):
+                self.assertAlmostEqual(score, evaluator.evaluate_position(child, color), places=9)
+
+class TestIncrementalEvaluation(unittest.TestCase):
+    def test_incremental_matches_full(self):
+        """Оценка, которую ведет доска, совпадает с полной и восстанавливается при отмене"""
+        evaluator = PositionEvaluator()
+        board = Board()
+        evaluator.attach(board)
+        start_score = board.eval_score
+        rng = random.Random(7)
+        color = Color.WHITE
+        for _ in range(40):
+            moves = board.get_all_moves(color)
+            if not moves or board.is_king_captured():
+                break
+            board.make_move(*rng.choice(moves))
+            color = Color.BLACK if color == Color.WHITE else Color.WHITE
+            # Доска из байтов — без таблицы, оценка считается обходом клеток
+            plain = Board.from_bytes(board.to_bytes())
+            for side in (Color.WHITE, Color.BLACK):
+                self.assertAlmostEqual(evaluator.evaluate_position(board, side),
+                                       evaluator.evaluate_position(plain, side), places=9)
+        while board.undo_stack:
+            board.unmake_move()
+        self.assertEqual(board.eval_score, start_score)
+    
+    def test_other_table_falls_back(self):
+        """Если на доске чужая таблица, оценка считается полностью"""
+        evaluator = PositionEvaluator()
+        other = PositionEvaluator()
+        other.piece_values[PieceType.PAWN] = 2.0
+        other.refresh_tables()
+        board = Board()
+        board.make_move((3, 0), (2, 0))
+        other.attach(board)
+        plain = Board.from_bytes(board.to_bytes())
+        self.assertAlmostEqual(evaluator.evaluate_position(board, Color.WHITE),
+                               evaluator.evaluate_position(plain, Color.WHITE), places=9)
+
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+from chess5x5.game.board import Board, decode_move, new_move_buffer
+from chess5x5.perft import PERFT_POSITIONS, perft_by_ray_scan, scan_moves
+
+# Эталонные значения посчитаны исходным генератором (обход доски через
+# get_legal_moves с копированием доски на каждом ходу)
+REFERENCE_COUNTS = {
+    "start": [5, 28, 236, 1926, 19992],
+    "promotion": [9, 73, 912, 9983],
+    "bishops": [9, 97, 995, 9114],
+    "king_capture": [12, 70, 760, 5975],
+    "midgame": [17, 151, 2462, 25448],
+}
+
+
+class TestPerft(unittest.TestCase):
+    def test_reference_counts(self):
+        """perft совпадает с эталоном во всех тестовых позициях"""
+        for name, counts in REFERENCE_COUNTS.items():
+            board = Board.from_fen(PERFT_POSITIONS[name])
+            key = board.zobrist_key
+            for depth, expected in enumerate(counts, 1):
+                with self.subTest(position=name, depth=depth):
+                    self.assertEqual(board.perft(depth), expected)
+            # После перебора позиция должна вернуться в исходную
+            self.assertEqual(board.zobrist_key, key)
+            self.assertEqual(board.undo_stack, [])
+
+    def test_divide_sums_to_perft(self):
+        """Сумма divide равна perft"""
+        board = Board.from_fen(PERFT_POSITIONS["midgame"])
+        divide = board.divide(3)
+        self.assertEqual(len(divide), REFERENCE_COUNTS["midgame"][0])
+        self.assertEqual(sum(divide.values()), REFERENCE_COUNTS["midgame"][2])
+
+    def test_ray_scan_perft(self):
+        """Независимый перебор по лучам дает те же числа"""
+        for name, counts in REFERENCE_COUNTS.items():
+            board = Board.from_fen(PERFT_POSITIONS[name])
+            with self.subTest(position=name):
+                self.assertEqual(perft_by_ray_scan(board, 3), counts[2])
+
+    def test_scan_moves_match_generator(self):
+        """Ходы обхода по лучам совпадают с generate_moves в позициях случайных партий"""
+        rnd = random.Random(5)
+        buffer = new_move_buffer()
+        for _ in range(30):
+            board = Board()
+            for _ in range(rnd.randint(0, 30)):
+                if board.is_king_captured():
+                    break
+                color = board.side_to_move
+                expected = sorted(scan_moves(board, color))
+                moves = board.generate_moves(color, buffer)
+                self.assertEqual(sorted(decode_move(move) for move in moves), expected)
+                if not moves:
+                    break
+                board.make_encoded_move(rnd.choice(list(moves)))
+
+
+if __name__ == '__main__':
+    unittest.main()
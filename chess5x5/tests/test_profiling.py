@@ -0,0 +1,85 @@
+import io
+import tracemalloc
+import unittest
+from contextlib import redirect_stdout
+from chess5x5.game.board import Board, Color
+from chess5x5.game.evaluation import PositionEvaluator
+from chess5x5.game.game import Game
+from chess5x5.game.profiling import EvaluatorProfile, ProfiledEvaluator, memory_tracing
+from chess5x5.tournament.tournament import Tournament
+
+def evaluate_position(board: Board, color: Color) -> float:
+    return PositionEvaluator().evaluate_position(board, color)
+
+class TestProfiling(unittest.TestCase):
+    def test_profile_summary(self):
+        """Сводка профиля: число вызовов, процентили и сумма времени"""
+        profile = EvaluatorProfile()
+        for wall_time in (0.001, 0.002, 0.003, 0.004):
+            profile.record(wall_time, wall_time / 2)
+        summary = profile.summary()
+        self.assertEqual(summary["eval_calls"], 4)
+        self.assertAlmostEqual(summary["eval_time_total"], 0.01)
+        self.assertAlmostEqual(summary["eval_time_p50"], 0.002)
+        self.assertAlmostEqual(summary["eval_time_p99"], 0.004)
+        self.assertAlmostEqual(summary["eval_cpu_time"], 0.005)
+        
+        other = EvaluatorProfile()
+        other.record(0.005, 0.0, 1024)
+        profile.merge(other)
+        self.assertEqual(profile.summary()["eval_calls"], 5)
+        self.assertEqual(profile.peak_memory, 1024)
+    
+    def test_profiled_evaluator_memory(self):
+        """С trace_memory замеряется пик памяти вызова"""
+        def allocating(board, color):
+            return float(len(bytearray(100000)))
+        profiled = ProfiledEvaluator(allocating, trace_memory=True)
+        # Без включенного tracemalloc память не замеряется и трассировка не включается
+        profiled(Board(), Color.WHITE)
+        self.assertEqual(profiled.profile.peak_memory, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+        with memory_tracing():
+            profiled(Board(), Color.WHITE)
+        self.assertFalse(tracemalloc.is_tracing())
+        if hasattr(tracemalloc, 'reset_peak'):
+            self.assertGreaterEqual(profiled.profile.peak_memory, 100000)
+    
+    def test_tracing_stops(self):
+        """Game и Tournament выключают tracemalloc после партии, в том числе при ошибке"""
+        game = Game(evaluate_position, evaluate_position, profile=True, trace_memory=True)
+        with redirect_stdout(io.StringIO()):
+            game.play_game()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertGreater(game.profiles[Color.WHITE].peak_memory, 0)
+        
+        def failing(board, color):
+            raise RuntimeError("ошибка оценщика")
+        tournament = Tournament([("first", evaluate_position), ("second", failing)], trace_memory=True)
+        with redirect_stdout(io.StringIO()), self.assertRaises(RuntimeError):
+            tournament.play_tournament()
+        self.assertFalse(tracemalloc.is_tracing())
+    
+    def test_game_profiles(self):
+        """Game с profile=True записывает вызовы оценки каждой стороны"""
+        game = Game(evaluate_position, evaluate_position, profile=True)
+        with redirect_stdout(io.StringIO()):
+            game.play_game()
+        self.assertGreater(game.profiles[Color.WHITE].calls, 0)
+        self.assertGreater(game.profiles[Color.BLACK].calls, 0)
+    
+    def test_tournament_statistics(self):
+        """Статистика турнира содержит профиль каждого участника"""
+        tournament = Tournament([("first", evaluate_position), ("second", evaluate_position)])
+        with redirect_stdout(io.StringIO()):
+            tournament.play_tournament()
+        statistics = tournament.get_statistics()
+        calls = sum(stats["eval_calls"] for stats in statistics.values())
+        # Попадания в кэш не вызывают функцию оценки
+        self.assertEqual(calls, tournament.get_cache_statistics()["misses"])
+        for stats in statistics.values():
+            self.assertGreater(stats["eval_time_total"], 0)
+            self.assertLessEqual(stats["eval_time_p50"], stats["eval_time_max"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+import math
+import sys
+import time
+import unittest
+from chess5x5.game.ai import AlphaBetaAI, _next_above_compat
+from chess5x5.game.board import Board, Color, MOVE_CAPTURE, decode_move
+from chess5x5.game.evaluation import PositionEvaluator
+from chess5x5.game.symmetry import transform_board
+
+def minimax(board: Board, depth: int, color: Color, evaluator) -> float:
+    """Полный перебор без отсечений: оценка для стороны color"""
+    if board.is_king_captured() or depth == 0:
+        return evaluator(board, color)
+    opponent = Color.BLACK if color == Color.WHITE else Color.WHITE
+    value = float('-inf')
+    for move in list(board.generate_moves(color)):
+        record = board.make_encoded_move(move)
+        value = max(value, -minimax(board, depth - 1, opponent, evaluator))
+        board.unmake_move(record)
+    return value
+
+def legal_moves(board: Board, color: Color):
+    return [move for move, _ in board.divide(1).items()] if board.side_to_move == color else []
+
+class TestIterativeDeepening(unittest.TestCase):
+    def test_max_depth(self):
+        """Без ограничения времени поиск проходит все итерации до max_depth"""
+        board = Board()
+        ai = AlphaBetaAI(PositionEvaluator())
+        move = ai.search(board, Color.WHITE, max_depth=3)
+        self.assertIn(move, legal_moves(board, Color.WHITE))
+        self.assertEqual(ai.completed_depth, 3)
+    
+    def test_time_limit(self):
+        """Поиск укладывается в лимит времени и не меняет доску"""
+        board = Board.from_fen("rbkbr/p1ppp/1p3/P1PPP/RBKBR w")
+        fen, key = board.to_fen(), board.zobrist_key
+        ai = AlphaBetaAI(PositionEvaluator())
+        start = time.perf_counter()
+        move = ai.search(board, Color.WHITE, time_limit=0.2)
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 1.0)
+        self.assertIn(move, legal_moves(board, Color.WHITE))
+        self.assertGreaterEqual(ai.completed_depth, 1)
+        self.assertEqual((board.to_fen(), board.zobrist_key), (fen, key))
+        self.assertIsNone(board.eval_table)
+    
+    def test_first_iteration_completes(self):
+        """Первая итерация завершается даже при нулевом лимите"""
+        board = Board()
+        ai = AlphaBetaAI(PositionEvaluator())
+        self.assertIn(ai.search(board, Color.WHITE, time_limit=0.0), legal_moves(board, Color.WHITE))
+        self.assertEqual(ai.completed_depth, 1)
+    
+    def test_no_moves(self):
+        """Без возможных ходов поиск возвращает None"""
+        ai = AlphaBetaAI(PositionEvaluator())
+        self.assertIsNone(ai.search(Board.from_bytes(bytes(25)), Color.WHITE, max_depth=2))
+
+class TestMoveOrdering(unittest.TestCase):
+    def test_order(self):
+        """Ход из таблицы, затем взятия по MVV-LVA, затем ходы-убийцы"""
+        board = Board.from_fen("k4/5/1r1bR/2P2/K4 w")
+        ai = AlphaBetaAI(PositionEvaluator())
+        moves = board.generate_moves(Color.WHITE)
+        quiet = [move for move in moves if not move & MOVE_CAPTURE]
+        ai._killers = [[quiet[-1]]]
+        ordered = ai._order_moves(board, moves, Color.WHITE, 0, quiet[0])
+        self.assertEqual(sorted(ordered), sorted(moves))
+        self.assertEqual(ordered[0], quiet[0])
+        self.assertEqual([decode_move(move) for move in ordered[1:4]], [
+            ((3, 2), (2, 1)),  # пешка берет ладью
+            ((3, 2), (2, 3)),  # пешка берет слона
+            ((2, 4), (2, 3)),  # ладья берет слона
+        ])
+        self.assertEqual(ordered[4], quiet[-1])
+    
+    def test_fewer_nodes(self):
+        """Упорядочивание ходов сокращает перебор"""
+        fens = [
+            "rbkbr/ppppp/5/PPPPP/RBKBR w",
+            "rbkbr/p1ppp/1p3/P1PPP/RBKBR w",
+            "r1k1r/ppbpp/2p2/PP1PP/RBK1R b",
+            "1bk1r/1pp1p/r2p1/PP1PP/RBK1R w",
+        ]
+        nodes = {}
+        for move_ordering in (False, True):
+            nodes[move_ordering] = 0
+            for fen in fens:
+                board = Board.from_fen(fen)
+                ai = AlphaBetaAI(PositionEvaluator(), move_ordering=move_ordering, quiescence=False)
+                ai.get_best_move(board, board.side_to_move, 5)
+                self.assertEqual(ai.get_search_statistics()["nodes"], ai.nodes)
+                nodes[move_ordering] += ai.nodes
+        self.assertLess(nodes[True], nodes[False])
+
+class TestQuiescence(unittest.TestCase):
+    def test_horizon(self):
+        """Без quiescence ладья берет защищенную пешку, с ней — нет"""
+        board = Board.from_fen("k4/1p3/2p2/5/K1R2 w")
+        greedy = AlphaBetaAI(PositionEvaluator(), quiescence=False)
+        self.assertEqual(greedy.get_best_move(board, Color.WHITE, 1), ((4, 2), (2, 2)))
+        ai = AlphaBetaAI(PositionEvaluator())
+        self.assertNotEqual(ai.get_best_move(board, Color.WHITE, 1), ((4, 2), (2, 2)))
+        self.assertGreater(ai.get_search_statistics()["quiescence_nodes"], 0)
+    
+    def test_quiet_position(self):
+        """В спокойной позиции quiescence возвращает статическую оценку"""
+        board = Board()
+        evaluator = PositionEvaluator()
+        ai = AlphaBetaAI(evaluator)
+        score = ai._quiescence(board, float('-inf'), float('inf'), Color.WHITE, 0)
+        self.assertEqual(score, evaluator(board, Color.WHITE))
+        self.assertEqual(ai.quiescence_nodes, 1)
+    
+    def test_delta_pruning(self):
+        """Delta pruning сокращает перебор взятий, не меняя выбранных ходов"""
+        for fen in ("rbkbr/p1ppp/1p3/P1PPP/RBKBR w", "1bk1r/1pp1p/r2p1/PP1PP/RBK1R w"):
+            board = Board.from_fen(fen)
+            full = AlphaBetaAI(PositionEvaluator(), delta_margin=None)
+            pruned = AlphaBetaAI(PositionEvaluator())
+            self.assertEqual(pruned.get_best_move(board, Color.WHITE, 3), full.get_best_move(board, Color.WHITE, 3))
+            self.assertLessEqual(pruned.quiescence_nodes, full.quiescence_nodes)
+
+class TestNegamax(unittest.TestCase):
+    FENS = [
+        "rbkbr/ppppp/5/PPPPP/RBKBR w",
+        "rbkbr/p1ppp/1p3/P1PPP/RBKBR w",
+        "r1k1r/ppbpp/2p2/PP1PP/RBK1R b",
+        "1bk1r/1pp1p/r2p1/PP1PP/RBK1R w",
+    ]
+    
+    def test_matches_minimax(self):
+        """Оценка корня с PVS и без совпадает с полным перебором"""
+        evaluator = PositionEvaluator()
+        for fen in self.FENS:
+            board = Board.from_fen(fen)
+            expected = minimax(board, 3, board.side_to_move, evaluator)
+            for principal_variation in (False, True):
+                ai = AlphaBetaAI(evaluator, tt_memory_mb=None, quiescence=False,
+                                 principal_variation=principal_variation)
+                _, value = ai._search_root(board, board.side_to_move, 3)
+                self.assertAlmostEqual(value, expected, places=9)
+    
+    def test_color_symmetry(self):
+        """Позиция и она же с переставленными цветами получают одну оценку"""
+        for fen in self.FENS:
+            board = Board.from_fen(fen)
+            flipped = transform_board(board, color_flip=True)
+            values = []
+            for position in (board, flipped):
+                ai = AlphaBetaAI(PositionEvaluator(), tt_memory_mb=None)
+                values.append(ai._search_root(position, position.side_to_move, 3)[1])
+            self.assertAlmostEqual(values[0], values[1], places=9)
+    
+    def test_aspiration_window(self):
+        """Узкое аспирационное окно дает тот же ход, при выходе оценки за окно — повторный перебор"""
+        researches = 0
+        for fen in self.FENS:
+            board = Board.from_fen(fen)
+            full = AlphaBetaAI(PositionEvaluator(), tt_memory_mb=None, aspiration_window=None)
+            narrow = AlphaBetaAI(PositionEvaluator(), tt_memory_mb=None, aspiration_window=0.01)
+            self.assertEqual(narrow.search(board, board.side_to_move, max_depth=4),
+                             full.search(board, board.side_to_move, max_depth=4))
+            researches += narrow.get_search_statistics()["aspiration_researches"]
+        self.assertGreater(researches, 0)
+    
+    def test_next_above_compat(self):
+        """Граница нулевого окна — следующее число double и без math.nextafter"""
+        self.assertEqual(_next_above_compat(1.0), 1.0 + 2.0 ** -52)
+        self.assertEqual(_next_above_compat(-1.0), -1.0 + 2.0 ** -53)
+        self.assertEqual(_next_above_compat(0.0), 5e-324)
+        self.assertEqual(_next_above_compat(-0.0), 5e-324)
+        self.assertEqual(_next_above_compat(-5e-324), -0.0)
+        self.assertEqual(_next_above_compat(-math.inf), -sys.float_info.max)
+        self.assertEqual(_next_above_compat(math.inf), math.inf)
+        for value in (0.37, -12.5, 1e300, -1e-300):
+            self.assertGreater(_next_above_compat(value), value)
+            if hasattr(math, 'nextafter'):
+                self.assertEqual(_next_above_compat(value), math.nextafter(value, math.inf))
+    
+    def test_fewer_nodes(self):
+        """PVS сокращает перебор"""
+        nodes = {}
+        for principal_variation in (False, True):
+            nodes[principal_variation] = 0
+            for fen in self.FENS:
+                board = Board.from_fen(fen)
+                ai = AlphaBetaAI(PositionEvaluator(), principal_variation=principal_variation)
+                ai.get_best_move(board, board.side_to_move, 5)
+                nodes[principal_variation] += ai.nodes + ai.quiescence_nodes
+        self.assertLess(nodes[True], nodes[False])
+
+if __name__ == '__main__':
+    unittest.main()
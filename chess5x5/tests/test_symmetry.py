@@ -0,0 +1,69 @@
+import random
+import unittest
+from chess5x5.game.board import Board, Color
+from chess5x5.game.evaluation import PositionEvaluator
+from chess5x5.game.symmetry import canonical_key, check_symmetry, transform_board
+from chess5x5.tournament.cache import EvaluationCache
+
+def random_boards(count: int, seed: int = 11):
+    """Позиции после нескольких случайных ходов из начальной"""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = Board()
+        color = Color.WHITE
+        for _ in range(rng.randint(1, 12)):
+            moves = board.get_all_moves(color)
+            if not moves or board.is_king_captured():
+                break
+            board.make_move(*rng.choice(moves))
+            color = Color.BLACK if color == Color.WHITE else Color.WHITE
+        boards.append(board)
+    return boards
+
+class TestSymmetry(unittest.TestCase):
+    def test_transform_is_involution(self):
+        """Двойное отражение возвращает исходную позицию"""
+        for board in random_boards(10):
+            for mirror, color_flip in ((True, False), (False, True), (True, True)):
+                twice = transform_board(transform_board(board, mirror, color_flip), mirror, color_flip)
+                self.assertEqual(twice.to_bytes(), board.to_bytes())
+    
+    def test_canonical_key(self):
+        """Позиция и ее отражения получают один канонический ключ"""
+        for board in random_boards(10):
+            key = canonical_key(board, Color.WHITE, color_flip=True)
+            self.assertEqual(canonical_key(transform_board(board, mirror=True), Color.WHITE,
+                                           color_flip=True), key)
+            flipped = transform_board(board, color_flip=True)
+            # Оценка за белых равна оценке позиции с переставленными цветами за черных
+            self.assertEqual(canonical_key(flipped, Color.BLACK, color_flip=True), key)
+            self.assertNotEqual(canonical_key(flipped, Color.WHITE, color_flip=True), key)
+        board = Board()
+        self.assertEqual(canonical_key(board, Color.WHITE, mirror=False), (board.zobrist_key, Color.WHITE))
+    
+    def test_evaluator_symmetry(self):
+        """Симметрии PositionEvaluator следуют из его таблиц"""
+        evaluator = PositionEvaluator()
+        self.assertTrue(evaluator.mirror_symmetric)
+        self.assertTrue(evaluator.color_symmetric)
+        self.assertEqual(check_symmetry(evaluator, random_boards(10)), (True, True))
+        
+        evaluator.center_bonus[1][1] = 0.4
+        evaluator.refresh_tables()
+        self.assertFalse(evaluator.mirror_symmetric)
+        self.assertEqual(check_symmetry(evaluator, random_boards(10)), (False, True))
+    
+    def test_cache_shares_mirrored_positions(self):
+        """Кэш симметричного оценщика отдает оценку отраженной позиции"""
+        cache = EvaluationCache()
+        evaluator = PositionEvaluator()
+        cached = cache.wrap(0, evaluator)
+        board = random_boards(1)[0]
+        score = cached(board, Color.WHITE)
+        self.assertEqual(cached(transform_board(board, mirror=True), Color.WHITE), score)
+        self.assertEqual(cached(transform_board(board, color_flip=True), Color.BLACK), score)
+        self.assertEqual(cache.get_statistics()["hits"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import io
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from chess5x5.game.ai import AlphaBetaAI
+from chess5x5.game.board import Board, Color, move_to_square
+from chess5x5.game.evaluation import PositionEvaluator
+from chess5x5.game.game import Game
+from chess5x5.game.symmetry import transform_board
+from chess5x5.game.tablebase import (
+    Tablebase, WIN, DRAW, LOSS, TABLEBASE_WIN_SCORE, canonical_material, generate_tablebases,
+    material_name,
+)
+
+def wins_within(board: Board, plies: int) -> bool:
+    """Может ли сторона, чей ход, взять короля не более чем за plies полуходов"""
+    color = board.side_to_move
+    moves = board.generate_moves(color)
+    enemy_king = board.king_squares[Color.BLACK if color == Color.WHITE else Color.WHITE]
+    if any(move_to_square(move) == enemy_king for move in moves):
+        return plies >= 1
+    if plies < 3:
+        return False
+    for move in moves:
+        record = board.make_encoded_move(move)
+        lost = loses_within(board, plies - 1)
+        board.unmake_move(record)
+        if lost:
+            return True
+    return False
+
+def loses_within(board: Board, plies: int) -> bool:
+    """Проигрывает ли сторона, чей ход, не позже чем через plies полуходов"""
+    moves = board.generate_moves(board.side_to_move)
+    if not moves:
+        return True
+    if plies < 2:
+        return False
+    for move in moves:
+        record = board.make_encoded_move(move)
+        won = wins_within(board, plies - 1)
+        board.unmake_move(record)
+        if not won:
+            return False
+    return True
+
+class TestTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.tablebase = generate_tablebases(["KRvK", "KPvK"], cls.directory.name)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+    
+    def test_material_names(self):
+        self.assertEqual(material_name(Board()), "KRRBBPPPPPvKRRBBPPPPP")
+        self.assertEqual(canonical_material("KvKR"), ("KRvK", True))
+        self.assertEqual(canonical_material("KRvKB"), ("KRvKB", False))
+        self.assertEqual(canonical_material("KBvKR"), ("KRvKB", True))
+        # Таблица KvK строится как зависимость, KRvKP — нет
+        self.assertIsNotNone(self.tablebase.probe(Board.from_fen("2k2/5/5/5/2K2 w")))
+        self.assertIsNone(self.tablebase.probe(Board.from_fen("2k2/4p/5/5/R1K2 w")))
+        self.assertIsNone(self.tablebase.probe(Board()))
+    
+    def test_results_match_search(self):
+        """Результат и расстояние совпадают с полным перебором"""
+        rng = random.Random(3)
+        checked = 0
+        for fen_pieces in ("K", "R", "P"):
+            for _ in range(60):
+                squares = rng.sample(range(25), 3)
+                if fen_pieces == "P" and squares[2] // 5 in (0, 4):
+                    continue
+                board = Board.from_bytes(bytes(25))
+                board.board[squares[0] // 5][squares[0] % 5] = Board().get_piece(4, 2)
+                board.board[squares[1] // 5][squares[1] % 5] = Board().get_piece(0, 2)
+                if fen_pieces != "K":
+                    piece = Board().get_piece(4, 0) if fen_pieces == "R" else Board().get_piece(3, 0)
+                    board.board[squares[2] // 5][squares[2] % 5] = piece
+                board.set_side_to_move(rng.choice([Color.WHITE, Color.BLACK]))
+                result = self.tablebase.probe(board)
+                if result.wdl == WIN and result.distance <= 5:
+                    self.assertTrue(wins_within(board, result.distance))
+                    self.assertFalse(wins_within(board, result.distance - 2))
+                    checked += 1
+                elif result.wdl == LOSS and result.distance <= 4:
+                    self.assertTrue(loses_within(board, result.distance))
+                    if result.distance >= 2:
+                        self.assertFalse(loses_within(board, result.distance - 2))
+                    checked += 1
+                elif result.wdl == DRAW:
+                    self.assertFalse(wins_within(board, 5))
+                    self.assertFalse(loses_within(board, 4))
+        self.assertGreater(checked, 20)
+    
+    def test_color_flip_probe(self):
+        """Позиции с переставленными цветами ищутся в той же таблице"""
+        board = Board.from_fen("5/2k2/5/2P2/K4 w")
+        flipped = transform_board(board, color_flip=True)
+        self.assertEqual(material_name(flipped), "KvKP")
+        self.assertEqual(self.tablebase.probe(flipped), self.tablebase.probe(board))
+    
+    def test_ai_uses_tablebase(self):
+        """AlphaBetaAI с таблицами выбирает ход к самому быстрому выигрышу"""
+        board = Board.from_fen("2k2/5/5/5/R1K2 w")
+        ai = AlphaBetaAI(PositionEvaluator(), tablebase=self.tablebase)
+        best = ai.get_best_move(board, Color.WHITE, depth=2)
+        board.make_move(*best)
+        self.assertEqual(self.tablebase.probe(board).wdl, LOSS)
+        self.assertEqual(self.tablebase.score(board, Color.WHITE),
+                         TABLEBASE_WIN_SCORE - self.tablebase.probe(board).distance)
+    
+    def test_game_adjudication(self):
+        """Game с таблицами завершает партию, как только позиция есть в таблице"""
+        game = Game(PositionEvaluator(), PositionEvaluator(), tablebase=self.tablebase)
+        game.board = Board.from_fen("2k2/5/5/5/R1K2 w")
+        with redirect_stdout(io.StringIO()):
+            winner = game.play_game()
+        self.assertEqual(winner, Color.WHITE)
+        self.assertEqual(game.move_history, [])
+
+if __name__ == '__main__':
+    unittest.main()
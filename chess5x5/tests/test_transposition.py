@@ -0,0 +1,81 @@
+import unittest
+from chess5x5.game.ai import AlphaBetaAI
+from chess5x5.game.board import Board, Color
+from chess5x5.game.evaluation import PositionEvaluator
+from chess5x5.game.transposition import (
+    ENTRY_BYTES, EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable,
+)
+from helpers import CountingEvaluator
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_probe_and_store(self):
+        table = TranspositionTable(max_entries=8)
+        self.assertIsNone(table.probe(5))
+        table.store(5, 3, LOWER_BOUND, 1.5, 0x123)
+        entry = table.probe(5)
+        self.assertEqual((entry.depth, entry.bound, entry.score, entry.move), (3, LOWER_BOUND, 1.5, 0x123))
+        table.store(6, 1, UPPER_BOUND, -2.0, None)
+        self.assertIsNone(table.probe(6).move)
+        stats = table.get_statistics()
+        self.assertEqual((stats["probes"], stats["hits"], stats["entries"]), (3, 2, 2))
+    
+    def test_memory_limit(self):
+        table = TranspositionTable(max_memory_mb=1)
+        self.assertEqual(table.capacity, 1024 * 1024 // ENTRY_BYTES)
+        with self.assertRaises(ValueError):
+            TranspositionTable(max_memory_mb=0)
+    
+    def test_replace_by_depth(self):
+        """В ячейке остается более глубокая запись текущего поиска"""
+        table = TranspositionTable(max_entries=8)
+        table.store(1, 4, EXACT, 1.0, None)
+        table.store(9, 2, EXACT, 2.0, None)  # та же ячейка, меньшая глубина
+        self.assertEqual(table.probe(1).score, 1.0)
+        self.assertIsNone(table.probe(9))
+        self.assertEqual(table.collisions, 1)
+        
+        table.store(9, 4, EXACT, 2.0, None)
+        self.assertEqual(table.probe(9).score, 2.0)
+        self.assertEqual(table.overwrites, 1)
+        
+        # Записи прошлого поиска вытесняются независимо от глубины
+        table.new_search()
+        table.store(1, 1, EXACT, 3.0, None)
+        self.assertEqual(table.probe(1).score, 3.0)
+        self.assertEqual(len(table), 1)
+
+class TestAlphaBetaTransposition(unittest.TestCase):
+    POSITIONS = [
+        Board().to_fen(),
+        "rbkbr/p1ppp/1p3/P1PPP/RBKBR w",
+        "r1k1r/ppbpp/2p2/PP1PP/RBK1R b",
+    ]
+    
+    def test_same_moves(self):
+        """С таблицей выбираются те же ходы, что и без нее"""
+        for fen in self.POSITIONS:
+            board = Board.from_fen(fen)
+            with_table = AlphaBetaAI(PositionEvaluator())
+            without_table = AlphaBetaAI(PositionEvaluator(), tt_memory_mb=None)
+            self.assertEqual(with_table.get_best_move(board, board.side_to_move, 3),
+                             without_table.get_best_move(board, board.side_to_move, 3))
+            self.assertEqual(board.to_fen(), fen)
+    
+    def test_fewer_evaluations(self):
+        """Таблица сокращает число вызовов оценки; повторный поиск берет результат из нее"""
+        board = Board()
+        plain_evaluator = CountingEvaluator()
+        AlphaBetaAI(plain_evaluator, tt_memory_mb=None, quiescence=False).get_best_move(board, Color.WHITE, 5)
+        
+        evaluator = CountingEvaluator()
+        ai = AlphaBetaAI(evaluator, tt_memory_mb=1, quiescence=False)
+        first = ai.get_best_move(board, Color.WHITE, 5)
+        self.assertLess(evaluator.calls, plain_evaluator.calls)
+        self.assertGreater(ai.transposition_table.get_statistics()["hits"], 0)
+        
+        calls = evaluator.calls
+        self.assertEqual(ai.get_best_move(board, Color.WHITE, 5), first)
+        self.assertLess(evaluator.calls - calls, calls)
+
+if __name__ == '__main__':
+    unittest.main()